@@ -0,0 +1,99 @@
+"""
+Compares YAMLDocstringParser.discover_parameters with the nested loop and
+per-paramType filtering it used to do, on endpoints with many filter
+parameters.
+
+    python benchmarks/bench_discover_parameters.py [repeat]
+"""
+import sys
+import timeit
+
+from common import setup_django
+
+setup_django()
+
+from rest_framework_swagger.compat import OrderedDict  # noqa
+from rest_framework_swagger.introspectors import YAMLDocstringParser  # noqa
+from rest_framework_swagger.records import Parameter  # noqa
+
+
+class Inspector(object):
+    callback = None
+
+    def __init__(self, count):
+        self.count = count
+
+    def get_parameters(self):
+        return [
+            Parameter(paramType='query', name='filter_%d' % index,
+                      type='string')
+            for index in range(self.count)
+        ]
+
+    def get_http_method(self):
+        return 'GET'
+
+
+def make_parser(count):
+    parser = YAMLDocstringParser.__new__(YAMLDocstringParser)
+    parser.object = {
+        'parameters_strategy': {'form': 'replace'},
+        'parameters': [
+            {'name': 'filter_%d' % index, 'paramType': 'query',
+             'type': 'integer'}
+            for index in range(0, count, 2)
+        ] + [{'name': 'body', 'paramType': 'form'}],
+    }
+    return parser
+
+
+def legacy_discover_parameters(parser, inspector):
+    parameters = []
+    docstring_params = parser.get_parameters(inspector.callback)
+    method_params = inspector.get_parameters()
+
+    for meth_param in method_params:
+        for doc_param in docstring_params:
+            if doc_param['name'] == meth_param['name']:
+                if 'paramType' in doc_param:
+                    meth_param['paramType'] = doc_param['paramType']
+
+    for param_type in parser.PARAM_TYPES:
+        if parser.should_omit_parameters(param_type):
+            continue
+        strategy = parser.get_parameters_strategy(param_type=param_type)
+        method = [p for p in method_params
+                  if p.get('paramType') == param_type]
+        docstring = [p for p in docstring_params
+                     if p.get('paramType') == param_type]
+        if strategy == 'replace':
+            parameters += docstring or method
+        else:
+            merged = OrderedDict()
+            for item in method + docstring:
+                merged[item['name']] = item
+            parameters += list(merged.values())
+
+    return parameters
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print('%-12s %12s %12s' % ('parameters', 'legacy (s)', 'indexed (s)'))
+    for count in (10, 100, 300, 1000):
+        parser = make_parser(count)
+        inspector = Inspector(count)
+        assert legacy_discover_parameters(parser, inspector) == \
+            parser.discover_parameters(inspector)
+
+        legacy = timeit.timeit(
+            lambda: legacy_discover_parameters(parser, inspector),
+            number=repeat)
+        indexed = timeit.timeit(
+            lambda: parser.discover_parameters(inspector), number=repeat)
+        print('%-12d %12.4f %12.4f' % (count, legacy, indexed))
+
+
+if __name__ == '__main__':
+    main()
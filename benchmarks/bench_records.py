@@ -0,0 +1,144 @@
+"""
+Compares the memory held by endpoints, operations and parameters built as
+dicts, as the generator used to, with the records in
+rest_framework_swagger.records. Then documents a synthetic API through
+UrlParser and DocumentationGenerator, comparing records kept until the
+declaration is rendered with records converted to dicts after each stage.
+
+    python benchmarks/bench_records.py [endpoints] [documented endpoints]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from common import make_views, setup_django
+
+setup_django()
+
+from django.conf.urls import url  # noqa
+from rest_framework_swagger.docgenerator import DocumentationGenerator  # noqa
+from rest_framework_swagger.records import (  # noqa
+    Endpoint,
+    Operation,
+    Parameter,
+    to_dict,
+)
+from rest_framework_swagger.urlparser import UrlParser  # noqa
+
+PARAMETERS_PER_OPERATION = 6
+
+
+def build_dicts(count):
+    endpoints = []
+    for index in range(count):
+        parameters = [{
+            'paramType': 'query',
+            'name': 'param_%d' % param,
+            'description': '',
+            'required': False,
+            'type': 'string',
+        } for param in range(PARAMETERS_PER_OPERATION)]
+        endpoints.append(({
+            'path': '/resource/%d' % index,
+            'pattern': None,
+            'callback': None,
+        }, {
+            'method': 'GET',
+            'summary': '',
+            'nickname': 'Resource',
+            'notes': '',
+            'type': 'object',
+            'parameters': parameters,
+        }))
+    return endpoints
+
+
+def build_records(count):
+    endpoints = []
+    for index in range(count):
+        parameters = [Parameter(
+            paramType='query',
+            name='param_%d' % param,
+            description='',
+            required=False,
+            type='string',
+        ) for param in range(PARAMETERS_PER_OPERATION)]
+        endpoints.append((Endpoint(
+            path='/resource/%d' % index,
+            pattern=None,
+            callback=None,
+        ), Operation(
+            method='GET',
+            summary='',
+            nickname='Resource',
+            notes='',
+            type='object',
+            parameters=parameters,
+        )))
+    return endpoints
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    endpoints = build(count)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del endpoints
+    return retained, peak
+
+
+def document(patterns, convert):
+    """
+    Documents every API, as the declaration view does before rendering,
+    passing each stage's output through `convert`
+    """
+    apis = convert(UrlParser().get_apis(patterns))
+    generator = DocumentationGenerator()
+    return (
+        [dict(api, operations=convert(api['operations']))
+         for api in generator.iter_generate(apis)],
+        convert(generator.get_models(apis)),
+    )
+
+
+def measure_pipeline(convert, patterns):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    declaration = document(patterns, convert)
+    elapsed = time.time() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del declaration
+    return elapsed, retained, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print('%d endpoints, %d parameters each' % (
+        count, PARAMETERS_PER_OPERATION))
+    print('%-10s %14s %14s' % ('built as', 'retained (B)', 'peak (B)'))
+    for name, build in (('dicts', build_dicts), ('slots', build_records)):
+        print('%-10s %14d %14d' % ((name,) + measure(build, count)))
+
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    patterns = [url(r'^resource-%d/$' % index, view.as_view())
+                for index, view in enumerate(make_views(count))]
+    # Warm the process-wide docstring caches, so both runs share them
+    document(patterns, to_dict)
+
+    print('')
+    print('documenting %d endpoints' % count)
+    print('%-10s %10s %14s %14s' % (
+        'records', 'seconds', 'retained (B)', 'peak (B)'))
+    for name, convert in (('converted', to_dict),
+                          ('kept', lambda value: value)):
+        print('%-10s %10.4f %14d %14d' % (
+            (name,) + measure_pipeline(convert, patterns)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares rendering overridden docstrings through a throwaway subclass of
+the view, as get_view_description used to, with DocstringOverride.
+
+    python benchmarks/bench_view_description.py [endpoints]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from common import make_views, setup_django
+
+setup_django()
+
+from rest_framework.settings import api_settings  # noqa
+from rest_framework_swagger.introspectors import DocstringOverride  # noqa
+
+
+def render_with_subclass(view_cls, docstring):
+    view_cls = type(
+        view_cls.__name__ + '_fake',
+        (view_cls,),
+        {'__doc__': docstring})
+    return api_settings.VIEW_DESCRIPTION_FUNCTION(view_cls, False)
+
+
+def render_with_override(view_cls, docstring):
+    view_cls = DocstringOverride(view_cls, docstring)
+    return api_settings.VIEW_DESCRIPTION_FUNCTION(view_cls, False)
+
+
+def measure(render, views):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    for view in views:
+        render(view, view.get.__doc__)
+    elapsed = time.time() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained, peak, gc.collect()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    views = make_views(count)
+
+    print('%d endpoints' % count)
+    print('%-10s %10s %14s %14s %12s' % (
+        'path', 'seconds', 'retained (B)', 'peak (B)', 'garbage'))
+    for name, render in (('subclass', render_with_subclass),
+                         ('override', render_with_override)):
+        print('%-10s %10.4f %14d %14d %12d' % (
+            (name,) + measure(render, views)))
+
+
+if __name__ == '__main__':
+    main()
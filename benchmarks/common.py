@@ -0,0 +1,60 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def setup_django():
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            },
+        },
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'rest_framework',
+            'rest_framework_swagger',
+        ],
+        ROOT_URLCONF='rest_framework_swagger.urls',
+        SECRET_KEY='benchmarks',
+    )
+    django.setup()
+
+
+def make_views(count):
+    """
+    Builds `count` APIView classes with YAML docstrings on their methods
+    """
+    from rest_framework.views import APIView
+
+    views = []
+    for index in range(count):
+        def get(self, request):
+            pass
+
+        get.__doc__ = """
+        Retrieves resource %(index)d.
+
+        Longer description of resource %(index)d, with *markdown*.
+        ---
+        parameters:
+            - name: filter_%(index)d
+              paramType: query
+        """ % {'index': index}
+
+        views.append(type('Resource%dView' % index, (APIView,), {
+            '__doc__': 'Resource %d. Handles things.' % index,
+            '__module__': __name__,
+            'get': get,
+            'is_version_allowed': staticmethod(
+                lambda method, version: True),
+        }))
+    return views
@@ -1,3 +1,10 @@
+import itertools
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 VERSION = '0.3.5'
 
 
@@ -16,19 +23,86 @@ DEFAULT_SWAGGER_SETTINGS = {
     'template_path': 'rest_framework_swagger/index.html',
     'doc_expansion': 'none',
     'version_resolver': 'rest_framework_swagger.fake_version_resolver',
+    'data_types': {},
+    'enum_max_size': None,
+    'safe_default_values': False,
+    'incremental_cache': None,
+    'spec_cache_dir': None,
+    'spec_cache_max_files': 1000,
+    'streaming_json': False,
+    'generation_workers': None,
+    'single_flight': False,
+    'stale_while_revalidate': False,
+    'generation_lock_cache': None,
+    'server_timing': False,
+    'tracer': None,
 }
 
+
+class FrozenDict(Mapping):
+    """
+    A read-only mapping
+    """
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self._data)
+
+
+def freeze(value):
+    """
+    Returns a read-only copy of a structure of dicts, lists and sets
+    """
+    if isinstance(value, Mapping):
+        return FrozenDict(dict(
+            (key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+class SwaggerSettings(FrozenDict):
+    """
+    An immutable snapshot of SWAGGER_SETTINGS merged over the defaults.
+    Lists, dicts and sets in it are copied into tuples, read-only mappings
+    and frozensets, so changing the provided settings in place does not
+    change the snapshot.
+
+    Each change of the setting replaces the snapshot with one of a higher
+    `generation`, so values derived from the settings can be cached against
+    it. Read `rest_framework_swagger.SWAGGER_SETTINGS` when needed rather
+    than importing it, and read it once to use a consistent snapshot.
+    """
+    def __init__(self, provided_settings, generation):
+        data = dict(DEFAULT_SWAGGER_SETTINGS)
+        data.update(provided_settings or {})
+        super(SwaggerSettings, self).__init__(dict(
+            (key, freeze(value)) for key, value in data.items()))
+        self.generation = generation
+
+
+_generations = itertools.count(1)
+
 try:
     from django.conf import settings
     from django.test.signals import setting_changed
 
     def load_settings(provided_settings):
         global SWAGGER_SETTINGS
-        SWAGGER_SETTINGS = provided_settings
-
-        for key, value in DEFAULT_SWAGGER_SETTINGS.items():
-            if key not in SWAGGER_SETTINGS:
-                SWAGGER_SETTINGS[key] = value
+        SWAGGER_SETTINGS = SwaggerSettings(
+            provided_settings, next(_generations))
 
     def reload_settings(*args, **kwargs):
         setting, value = kwargs['setting'], kwargs['value']
@@ -41,7 +115,7 @@ try:
     setting_changed.connect(reload_settings)
     
 except:
-    SWAGGER_SETTINGS = DEFAULT_SWAGGER_SETTINGS
+    SWAGGER_SETTINGS = SwaggerSettings(DEFAULT_SWAGGER_SETTINGS, 0)
 
 class FakeVersionResolver(object):
     @staticmethod
@@ -4,18 +4,25 @@ from django.http import Http404
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
 
+from . import instrumentation
 from .compat import import_string
-from rest_framework_swagger import SWAGGER_SETTINGS
+import rest_framework_swagger as rfs
 
 
 class APIDocView(APIView):
     def initial(self, request, *args, **kwargs):
+        if instrumentation.timing_requested(request):
+            instrumentation.start_collecting()
+        else:
+            instrumentation.stop_collecting()
+
+        swagger_settings = rfs.SWAGGER_SETTINGS
         self.permission_classes = (self.get_permission_class(request),)
         self.host = request.build_absolute_uri()
-        self.api_path = SWAGGER_SETTINGS['api_path']
+        self.api_path = swagger_settings['api_path']
         self.api_full_uri = request.build_absolute_uri(self.api_path)
 
-        self.version_resolver = import_string(SWAGGER_SETTINGS['version_resolver'])
+        self.version_resolver = import_string(swagger_settings['version_resolver'])
         self.version = kwargs.get('version')
         if self.version:
             self.version = self.version_resolver.parse_version_string(self.version)
@@ -29,15 +36,38 @@ class APIDocView(APIView):
 
         return super(APIDocView, self).initial(request, *args, **kwargs)
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(APIDocView, self).finalize_response(
+            request, response, *args, **kwargs)
+
+        timings = instrumentation.get_timings()
+        if timings is not None and instrumentation.timings_in_body(request) \
+                and isinstance(getattr(response, 'data', None), dict):
+            response.data['timings'] = timings.as_dict()
+
+        if hasattr(response, 'render'):
+            with instrumentation.span('render'):
+                response.render()
+
+        if timings is not None:
+            instrumentation.stop_collecting()
+            # A streamed body is generated after the headers are sent, so
+            # they would leave out most of the work
+            if not getattr(response, 'streaming', False):
+                response['Server-Timing'] = timings.server_timing()
+
+        return response
+
     def get_permission_class(self, request):
-        if SWAGGER_SETTINGS['is_superuser'] and not request.user.is_superuser:
+        swagger_settings = rfs.SWAGGER_SETTINGS
+        if swagger_settings['is_superuser'] and not request.user.is_superuser:
             return IsAdminUser
-        if SWAGGER_SETTINGS['is_authenticated'] and not request.user.is_authenticated():
+        if swagger_settings['is_authenticated'] and not request.user.is_authenticated():
             return IsAuthenticated
         return AllowAny
 
     def handle_resource_access(self, request, resource):
-        resource_access_handler = SWAGGER_SETTINGS.get('resource_access_handler')
+        resource_access_handler = rfs.SWAGGER_SETTINGS['resource_access_handler']
         if isinstance(resource_access_handler, six.string_types):
             resource_access_handler = import_string(resource_access_handler)
             if resource_access_handler:
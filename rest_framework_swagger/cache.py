@@ -0,0 +1,287 @@
+"""Caches shared by the introspection and documentation generation code."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.utils import translation
+
+import rest_framework_swagger as rfs
+
+from . import dependencies
+from .compat import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe mapping which evicts its least recently used
+    entries once `maxsize` is exceeded
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+# os.rename does not overwrite existing files on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+
+def get_fingerprint(value):
+    """
+    A representation of a settings value which is stable between processes.
+    Callables and classes are represented by their dotted path rather than
+    their address.
+    """
+    if isinstance(value, (dict, rfs.FrozenDict)):
+        items = sorted(
+            (get_fingerprint(k), get_fingerprint(v)) for k, v in value.items())
+        return '{%s}' % ','.join('%s:%s' % item for item in items)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [get_fingerprint(item) for item in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return '[%s]' % ','.join(items)
+    if callable(value) and hasattr(value, '__name__'):
+        return '%s.%s' % (getattr(value, '__module__', ''), value.__name__)
+    return repr(value)
+
+
+_settings_fingerprint = (None, None)
+
+
+def get_settings_fingerprint():
+    """
+    Returns the fingerprint of the settings, computed once per settings
+    generation
+    """
+    global _settings_fingerprint
+    swagger_settings = rfs.SWAGGER_SETTINGS
+    generation, fingerprint = _settings_fingerprint
+    if generation != swagger_settings.generation:
+        fingerprint = get_fingerprint(dict(swagger_settings))
+        _settings_fingerprint = (swagger_settings.generation, fingerprint)
+    return fingerprint
+
+
+def make_spec_key(*parts):
+    """
+    Digests the package version, the settings and the given parts into a
+    key identifying a generated document
+    """
+    parts = (
+        rfs.VERSION,
+        get_settings_fingerprint(),
+        getattr(settings, 'REST_FRAMEWORK', {}),
+    ) + parts
+    return hashlib.md5(get_fingerprint(parts).encode('utf-8')).hexdigest()
+
+
+def get_spec_cache():
+    """
+    Returns the on-disk cache in the `spec_cache_dir` setting, if any
+    """
+    swagger_settings = rfs.SWAGGER_SETTINGS
+    directory = swagger_settings['spec_cache_dir']
+    if not directory:
+        return None
+    return FileSpecCache(directory, swagger_settings['spec_cache_max_files'])
+
+
+# Documents a process writes to a directory between two prunes of it
+PRUNE_INTERVAL = 100
+
+# Directory -> documents written to it since it was last pruned
+_writes_since_prune = {}
+_writes_lock = threading.Lock()
+
+
+class FileSpecCache(object):
+    """
+    A directory of generated documents shared by every process on a host.
+
+    Files are named after keys from `make_spec_key`. Each starts with a
+    line holding the signatures of the modules the document was generated
+    from, so code changes invalidate it too. Files are written to a
+    temporary file which is renamed into place, so readers never see a
+    partial document. Once the directory holds more than `max_files`
+    documents, the least recently written ones are removed; it is checked
+    on the first write of a process and every `PRUNE_INTERVAL` writes.
+    """
+    def __init__(self, directory, max_files=None):
+        self.directory = directory
+        self.max_files = max_files
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        try:
+            f = open(self.get_path(key), 'rb')
+        except (IOError, OSError):
+            return None
+
+        with f:
+            header = f.readline()
+            try:
+                if not header.endswith(b'\n'):
+                    raise ValueError('Truncated header')
+                signatures = json.loads(header.decode('utf-8'))
+                fresh = dependencies.is_fresh(signatures)
+            except (ValueError, IndexError, AttributeError):
+                # Truncated or edited by hand, so of no use to anyone
+                fresh = None
+            if fresh:
+                return f.read()
+
+        if fresh is None:
+            self.remove(key)
+        return None
+
+    def remove(self, key):
+        try:
+            os.unlink(self.get_path(key))
+        except OSError:
+            pass
+
+    def set(self, key, modules, content):
+        header = json.dumps(dependencies.get_signatures(modules))
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header.encode('utf-8') + b'\n')
+                f.write(content)
+            _replace(temp_path, self.get_path(key))
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+        if self.max_files and self._is_prune_due():
+            self.prune(self.max_files)
+
+    def _is_prune_due(self):
+        with _writes_lock:
+            writes = _writes_since_prune.get(self.directory, 0)
+            _writes_since_prune[self.directory] = (writes + 1) % PRUNE_INTERVAL
+        return writes == 0
+
+    def prune(self, max_files):
+        """
+        Removes the least recently written documents beyond `max_files`
+        """
+        names = [name for name in os.listdir(self.directory)
+                 if name.endswith('.json') and not name.startswith('.tmp-')]
+        if len(names) <= max_files:
+            return
+
+        documents = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                documents.append((os.stat(path).st_mtime, path))
+            except OSError:
+                # Removed by another process
+                continue
+
+        documents.sort()
+        for _, path in documents[:max(len(documents) - max_files, 0)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def get_or_generate(self, key, generate):
+        """
+        Returns the cached document for `key`, generating and storing it
+        with `generate` when it is missing or stale
+        """
+        content = self.get(key)
+        if content is None:
+            with dependencies.recording_generation() as modules:
+                content = generate()
+            self.set(key, modules, content)
+        return content
+
+
+_spec_store = None
+
+
+def get_spec_store():
+    return _spec_store
+
+
+def set_spec_store(store):
+    global _spec_store
+    _spec_store = store
+
+
+class SpecStore(object):
+    """
+    Read-only API declaration bodies held back to back in a single bytes
+    object, with an index of `(version, resource)` to their offset, length,
+    the paths of the APIs they document, and the language and settings
+    generation they were rendered in.
+
+    Built once before worker processes are forked, the buffer is shared
+    copy-on-write: serving a declaration slices it through a memoryview
+    without creating or touching any per-API Python objects.
+    """
+    def __init__(self, buffer, index, user_key):
+        self.buffer = buffer
+        self.index = index
+        self.user_key = user_key
+        self._view = memoryview(buffer)
+
+    def get(self, version, resource, user_key, api_paths):
+        """
+        Returns the declaration body for a resource, or None when it was not
+        preloaded, the request's user, authorized APIs or language differ,
+        or the settings changed since
+        """
+        entry = self.index.get((version, resource))
+        if entry is None or user_key != self.user_key:
+            return None
+
+        offset, length, paths, language, generation = entry
+        if paths != tuple(api_paths) or \
+                language != translation.get_language() or \
+                generation != rfs.SWAGGER_SETTINGS.generation:
+            return None
+        return self._view[offset:offset + length].tobytes()
+
+    def __len__(self):
+        return len(self.index)
@@ -0,0 +1,279 @@
+"""
+Coalesces concurrent generations of the same document: within a process,
+through a thread pool or single-flight calls, and between processes through
+a lock held in a shared cache.
+"""
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from timeit import default_timer
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils import six, translation
+
+try:
+    from concurrent import futures
+except ImportError:
+    # Python 2 without the `futures` backport
+    futures = None
+
+import rest_framework_swagger as rfs
+
+from .cache import LRUCache
+from .instrumentation import collecting_into, get_timings
+
+RECENT_SPECS_SIZE = 128
+
+# Seconds after which clients told a document is being generated may retry
+GENERATION_RETRY_AFTER = 1
+
+# Generations holding a cross-process lock for longer are presumed dead
+GENERATION_LOCK_TIMEOUT = 60
+GENERATION_LOCK_INTERVAL = 0.05
+
+_generations = None
+_generations_lock = threading.Lock()
+_single_flight = None
+
+
+class GenerationPending(Exception):
+    """
+    Raised when a document is being generated in the generations pool, for
+    the request to be answered without waiting for it
+    """
+
+
+def get_spec_generations():
+    """
+    Returns the generations pool sized by the `generation_workers` setting
+    """
+    global _generations
+    workers = rfs.SWAGGER_SETTINGS['generation_workers']
+    if not workers:
+        return None
+    if futures is None:
+        raise ImproperlyConfigured(
+            "The 'generation_workers' setting requires the futures package "
+            "on Python 2")
+
+    with _generations_lock:
+        if _generations is None or _generations.max_workers != workers:
+            if _generations is not None:
+                _generations.shutdown()
+            _generations = SpecGenerations(workers)
+        return _generations
+
+
+def run_generation(generate, language, timings=None):
+    """
+    Runs `generate` in a pool thread, in the language of the request which
+    submitted it, adding its spans to that request's `timings`
+    """
+    if language:
+        translation.activate(language)
+    try:
+        with collecting_into(timings):
+            return generate()
+    finally:
+        translation.deactivate()
+        # Pool threads are never closed by the request cycle
+        for connection in connections.all():
+            connection.close()
+
+
+class SpecGenerations(object):
+    """
+    Recently generated documents, and the generations in progress, by key.
+
+    A miss submits the generation to a thread pool. Callers missing on a key
+    which is already being generated get the same future rather than
+    starting another generation. Nothing here waits on the futures.
+    """
+    def __init__(self, max_workers, maxsize=RECENT_SPECS_SIZE):
+        self.max_workers = max_workers
+        self.recent = LRUCache(maxsize)
+        self._executor = futures.ThreadPoolExecutor(max_workers)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, generate):
+        """
+        Returns a future for the document, serving recent documents from
+        memory
+        """
+        content = self.recent.get(key)
+        if content is not None:
+            future = futures.Future()
+            future.set_result(content)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            submitted = future is None
+            if submitted:
+                future = self._executor.submit(
+                    run_generation, generate, translation.get_language(),
+                    get_timings())
+                self._pending[key] = future
+
+        # Callbacks run at once on finished futures, so never under the lock
+        if submitted:
+            future.add_done_callback(functools.partial(self._finished, key))
+        return future
+
+    def get(self, key, generate):
+        """
+        Returns the document when it is generated, raising GenerationPending
+        while it is being generated
+        """
+        future = self.submit(key, generate)
+        if not future.done():
+            raise GenerationPending(key)
+        return future.result()
+
+    def _finished(self, key, future):
+        # Stored before the pending future is dropped, so that no caller
+        # misses both
+        if not future.cancelled() and future.exception() is None:
+            self.recent.set(key, future.result())
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def get_single_flight():
+    """
+    Returns the process' `SingleFlight` when the `single_flight` setting is
+    on
+    """
+    global _single_flight
+    if not rfs.SWAGGER_SETTINGS['single_flight']:
+        return None
+
+    with _generations_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
+
+
+def get_lock_cache():
+    alias = rfs.SWAGGER_SETTINGS['generation_lock_cache']
+    if not alias:
+        return None
+    return caches[alias]
+
+
+@contextmanager
+def cache_lock(cache, key, timeout=GENERATION_LOCK_TIMEOUT):
+    """
+    Holds a lock shared by every process using `cache`, relying on `add`
+    only storing keys which are not already set. After waiting `timeout`
+    seconds the block runs without the lock.
+    """
+    lock_key = 'rest_framework_swagger:lock:%s' % key
+    deadline = default_timer() + timeout
+    acquired = cache.add(lock_key, True, timeout)
+    while not acquired and default_timer() < deadline:
+        time.sleep(GENERATION_LOCK_INTERVAL)
+        acquired = cache.add(lock_key, True, timeout)
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+def locked(cache, key, generate):
+    """
+    Wraps `generate` so it runs under the cross-process lock for `key`
+    """
+    @functools.wraps(generate)
+    def wrapper():
+        with cache_lock(cache, key):
+            return generate()
+    return wrapper
+
+
+class Flight(object):
+    """
+    A call in progress, whose result or error is shared with the callers
+    waiting for it
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+    def wait(self):
+        self.done.wait()
+        if self.exc_info is not None:
+            six.reraise(*self.exc_info)
+        return self.result
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls by key: the first caller generates while the
+    others wait for, and share, its result. The last result for each key is
+    kept, so that callers may be served it while it is regenerated.
+    """
+    def __init__(self, maxsize=RECENT_SPECS_SIZE):
+        self.last = LRUCache(maxsize)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, generate, stale=False):
+        """
+        Returns the result of `generate`, or of the call for `key` already
+        in progress. With `stale`, the previous result is returned at once
+        when there is one, and regenerated in a background thread.
+        """
+        previous = self.last.get(key) if stale else None
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if previous is not None:
+                return previous
+            return flight.wait()
+
+        if previous is not None:
+            refresh = threading.Thread(
+                target=self._refresh,
+                args=(key, flight, generate, translation.get_language()))
+            refresh.daemon = True
+            refresh.start()
+            return previous
+        return self._fly(key, flight, generate)
+
+    def _fly(self, key, flight, generate):
+        try:
+            flight.result = generate()
+            self.last.set(key, flight.result)
+        except Exception:
+            flight.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _refresh(self, key, flight, generate, language):
+        try:
+            run_generation(
+                functools.partial(self._fly, key, flight, generate), language)
+        except Exception:
+            # Served the previous result; callers waiting on the flight get
+            # the error
+            pass
@@ -0,0 +1,171 @@
+"""
+Tracks the Python modules each generated operation and model derives from,
+so entries cached by a previous process are only regenerated once one of
+those modules has changed on disk.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+
+import rest_framework_swagger as rfs
+
+_local = threading.local()
+
+_MISSING = object()
+
+
+@contextmanager
+def recording():
+    """
+    Collects the names of the modules recorded while the block runs. They
+    are also added to any enclosing recording.
+    """
+    outer = getattr(_local, 'modules', None)
+    modules = _local.modules = set()
+    try:
+        yield modules
+    finally:
+        _local.modules = outer
+        if outer is not None:
+            outer.update(modules)
+
+
+@contextmanager
+def recording_generation():
+    """
+    Records the modules a generated entry depends on, which always include
+    the settings module
+    """
+    with recording() as modules:
+        record_module(getattr(settings, 'SETTINGS_MODULE', None))
+        yield modules
+
+
+def record(obj):
+    """
+    Records the module an object is defined in. For classes, the modules of
+    every class in the MRO are recorded.
+    """
+    modules = getattr(_local, 'modules', None)
+    if modules is None or obj is None:
+        return
+
+    if inspect.isclass(obj):
+        modules.update(klass.__module__ for klass in inspect.getmro(obj))
+    else:
+        module = getattr(obj, '__module__', None)
+        if module:
+            modules.add(module)
+
+
+def record_module(name):
+    modules = getattr(_local, 'modules', None)
+    if modules is not None and name:
+        modules.add(name)
+
+
+def get_signature(module_name, path=None):
+    """
+    Returns the path, modification time and size of a module's source file.
+    The path is looked up from the loaded module unless given.
+    """
+    if path is None:
+        path = getattr(sys.modules.get(module_name), '__file__', None)
+        if not path:
+            return None
+        if path.endswith(('.pyc', '.pyo')):
+            path = path[:-1]
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [path, stat.st_mtime, stat.st_size]
+
+
+def get_signatures(modules):
+    return dict((module, get_signature(module)) for module in modules)
+
+
+def is_fresh(signatures):
+    """
+    Checks the modules behind a set of signatures are unchanged on disk,
+    without them having to be imported
+    """
+    for module, signature in signatures.items():
+        path = signature[0] if signature else None
+        if get_signature(module, path) != signature:
+            return False
+    return True
+
+
+def make_key(*parts):
+    """
+    Digests the package version, the settings, the active language and the
+    given parts into a cache key
+    """
+    from .cache import get_settings_fingerprint
+    parts = (
+        rfs.VERSION,
+        get_settings_fingerprint(),
+        translation.get_language(),
+    ) + parts
+    digest = hashlib.md5(repr(parts).encode('utf-8'))
+    return 'rest_framework_swagger:%s' % digest.hexdigest()
+
+
+def get_cache():
+    """
+    Returns the Django cache named by the `incremental_cache` setting
+    """
+    alias = rfs.SWAGGER_SETTINGS['incremental_cache']
+    if not alias:
+        return None
+    return DependencyCache(caches[alias])
+
+
+class DependencyCache(object):
+    """
+    Stores generated entries alongside the signatures of the modules they
+    were derived from. An entry is served until one of those modules
+    changes.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            return _MISSING
+
+        signatures, value = entry
+        if not is_fresh(signatures):
+            return _MISSING
+
+        # Entries nested in an outer recording still count as its dependencies
+        for module in signatures:
+            record_module(module)
+        return value
+
+    def set(self, key, modules, value):
+        try:
+            self.backend.set(key, (get_signatures(modules), value), None)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Unpicklable values are simply regenerated next time
+            pass
+
+    def get_or_generate(self, key, generate):
+        value = self.get(key)
+        if value is _MISSING:
+            with recording_generation() as modules:
+                value = generate()
+            self.set(key, modules, value)
+        return value
@@ -1,11 +1,14 @@
 """Generates API documentation by introspection."""
 import importlib
+import inspect
+import sys
+import threading
 from copy import copy
 
 import rest_framework
 from rest_framework import viewsets
 from rest_framework.serializers import BaseSerializer
-from rest_framework_swagger import SWAGGER_SETTINGS
+import rest_framework_swagger as rfs
 
 from .introspectors import (
     APIViewIntrospector,
@@ -15,24 +18,25 @@ from .introspectors import (
     WrappedAPIViewIntrospector,
     get_data_type,
     get_default_value,
+    get_enum,
 )
+from . import dependencies
 from .compat import OrderedDict
+from .concurrency import Flight
+from .instrumentation import traced
+from .records import Model, Operation
 
 
-class DocumentationGenerator(object):
-    # Serializers defined in docstrings
-    explicit_serializers = set()
-
-    # Serializers defined in fields
-    fields_serializers = set()
+# Guards adding to the shared_models memo, which generators share across
+# threads; serializers are introspected outside of it
+_shared_models_lock = threading.Lock()
 
-    # Response classes defined in docstrings
-    explicit_response_types = dict()
 
-    def __init__(self, for_user=None, version=None):
+class DocumentationGenerator(object):
+    def __init__(self, for_user=None, version=None, shared_models=None):
 
         # unauthenticated user is expected to be in the form 'module.submodule.Class' if a value is present
-        unauthenticated_user = SWAGGER_SETTINGS.get('unauthenticated_user')
+        unauthenticated_user = rfs.SWAGGER_SETTINGS['unauthenticated_user']
 
         self.version = version
 
@@ -44,20 +48,40 @@ class DocumentationGenerator(object):
 
         self.user = for_user
 
+        # Serializers defined in docstrings
+        self.explicit_serializers = set()
+
+        # Serializers defined in fields
+        self.fields_serializers = set()
+
+        # Response classes defined in docstrings
+        self.explicit_response_types = dict()
+
+        # Serializer -> the Flight introspecting its fields, shared by
+        # generators documenting other versions or resources, as models do
+        # not depend on either
+        self.shared_models = shared_models
+
+        self._patterns_index = (None, 0, {})
+
     def generate(self, apis):
         """
         Returns documentation for a list of APIs
         """
-        api_docs = []
+        return list(self.iter_generate(apis))
+
+    def iter_generate(self, apis):
+        """
+        Yields the documentation of each API in a list in turn
+        """
         for api in apis:
-            api_docs.append({
+            yield {
                 'description': IntrospectorHelper.get_summary(api['callback']),
                 'path': api['path'],
                 'operations': self.get_operations(api, apis),
-            })
-
-        return api_docs
+            }
 
+    @traced('get_introspector')
     def get_introspector(self, api, apis):
         path = api['path']
         pattern = api['pattern']
@@ -71,8 +95,7 @@ class DocumentationGenerator(object):
                 version=self.version,
             )
         elif issubclass(callback, viewsets.ViewSetMixin):
-            patterns = [a['pattern'] for a in apis
-                        if a['callback'] == callback]
+            patterns = self.get_patterns_by_callback(apis).get(callback, [])
             return ViewSetIntrospector(
                 callback,
                 path,
@@ -90,14 +113,69 @@ class DocumentationGenerator(object):
                 version=self.version,
             )
 
+    def get_patterns_by_callback(self, apis):
+        """
+        Groups the url patterns of a list of APIs by their callback. The
+        grouping is built once and reused while the same list is documented
+        """
+        indexed_apis, count, index = self._patterns_index
+        if indexed_apis is not apis or count != len(apis):
+            index = {}
+            for api in apis:
+                index.setdefault(api['callback'], []).append(api['pattern'])
+            self._patterns_index = (apis, len(apis), index)
+
+        return index
+
+    def get_user_key(self):
+        return self.user.__class__.__name__, getattr(self.user, 'pk', None)
+
     def get_operations(self, api, apis=None):
         """
         Returns docs for the allowed methods of an API endpoint
         """
         if apis is None:
             apis = [api]
+
+        cache = dependencies.get_cache()
+        if cache is None:
+            return self._get_operations(api, apis)
+
+        callback = api['callback']
+        patterns = self.get_patterns_by_callback(apis).get(callback, [])
+        key = dependencies.make_key(
+            'operations',
+            api['path'],
+            callback.__name__,
+            [getattr(getattr(p, 'regex', None), 'pattern', None)
+             for p in patterns],
+            self.version,
+            self.get_user_key(),
+        )
+        operations, response_types = cache.get_or_generate(
+            key, lambda: self._get_operations_and_response_types(api, apis))
+
+        self.explicit_response_types.update(response_types)
+        return operations
+
+    def _get_operations_and_response_types(self, api, apis):
+        """
+        Returns the operations of an API with the response types they
+        registered, so both can be restored from the incremental cache
+        """
+        registered = dict(self.explicit_response_types)
+        operations = self._get_operations(api, apis)
+        response_types = dict(
+            (name, response_type)
+            for name, response_type in self.explicit_response_types.items()
+            if registered.get(name) is not response_type
+        )
+        return operations, response_types
+
+    def _get_operations(self, api, apis):
         operations = []
 
+        dependencies.record(api['callback'])
         introspector = self.get_introspector(api, apis)
 
         for method_introspector in introspector:
@@ -119,6 +197,7 @@ class DocumentationGenerator(object):
                 # This version is not available for this HTTP method
                 continue
 
+            dependencies.record_module(method_introspector.get_module())
             doc_parser = method_introspector.get_yaml_parser()
 
             serializer = self._get_method_serializer(method_introspector)
@@ -126,13 +205,13 @@ class DocumentationGenerator(object):
             response_type = self._get_method_response_type(
                 doc_parser, serializer, introspector, method_introspector)
 
-            operation = {
-                'method': method_introspector.get_http_method(),
-                'summary': method_introspector.get_summary(),
-                'nickname': method_introspector.get_nickname(),
-                'notes': method_introspector.get_notes(),
-                'type': response_type,
-            }
+            operation = Operation(
+                method=method_introspector.get_http_method(),
+                summary=method_introspector.get_summary(),
+                nickname=method_introspector.get_nickname(),
+                notes=method_introspector.get_notes(),
+                type=response_type,
+            )
 
             if doc_parser.yaml_error is not None:
                 operation['notes'] += "<pre>YAMLError:\n {err}</pre>".format(
@@ -188,11 +267,11 @@ class DocumentationGenerator(object):
             w_properties = OrderedDict((k, v) for k, v in data['fields'].items()
                                        if k not in data['read_only'])
 
-            models[w_name] = {
-                'id': w_name,
-                'required': [i for i in data['required'] if i in w_properties.keys()],
-                'properties': w_properties,
-            }
+            models[w_name] = Model(
+                id=w_name,
+                required=[i for i in data['required'] if i in w_properties.keys()],
+                properties=w_properties,
+            )
 
             # Reading
             # no write_only fields
@@ -201,11 +280,11 @@ class DocumentationGenerator(object):
             r_properties = OrderedDict((k, v) for k, v in data['fields'].items()
                                        if k not in data['write_only'])
 
-            models[r_name] = {
-                'id': r_name,
-                'required': [i for i in r_properties.keys()],
-                'properties': r_properties,
-            }
+            models[r_name] = Model(
+                id=r_name,
+                required=[i for i in r_properties.keys()],
+                properties=r_properties,
+            )
 
             # Enable original model for testing purposes
             # models[serializer_name] = {
@@ -235,6 +314,7 @@ class DocumentationGenerator(object):
             return None
 
         serializer = method_inspector.get_response_serializer_class()
+        dependencies.record(serializer)
         return serializer
 
     def _get_method_response_type(self, doc_parser, serializer,
@@ -259,10 +339,10 @@ class DocumentationGenerator(object):
                 method=method_inspector.method.title().replace('_', '')
             )
             self.explicit_response_types.update({
-                response_type_name: {
-                    "id": response_type_name,
-                    "properties": response_type
-                }
+                response_type_name: Model(
+                    id=response_type_name,
+                    properties=response_type,
+                )
             })
             return response_type_name
         else:
@@ -317,6 +397,7 @@ class DocumentationGenerator(object):
 
         return serializers_set
 
+    @traced('serializer_fields')
     def _get_serializer_fields(self, serializer):
         """
         Returns serializer fields in the Swagger MODEL format
@@ -324,6 +405,43 @@ class DocumentationGenerator(object):
         if serializer is None:
             return
 
+        if self.shared_models is None:
+            return self._get_cached_serializer_fields(serializer)
+        # Holds the introspection of each serializer, so threads documenting
+        # the same one wait for the first, while others carry on
+        with _shared_models_lock:
+            flight = self.shared_models.get(serializer)
+            leader = flight is None
+            if leader:
+                flight = self.shared_models[serializer] = Flight()
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.result = self._get_cached_serializer_fields(serializer)
+        except Exception:
+            flight.exc_info = sys.exc_info()
+            raise
+        finally:
+            flight.done.set()
+        return flight.result
+
+    def _get_cached_serializer_fields(self, serializer):
+        cache = dependencies.get_cache()
+        name = getattr(serializer, '__qualname__', None) or \
+            getattr(serializer, '__name__', None)
+        if cache is None or not inspect.isclass(serializer) or \
+                '<locals>' in name:
+            return self._build_serializer_fields(serializer)
+
+        key = dependencies.make_key('model', serializer.__module__, name)
+        return cache.get_or_generate(
+            key, lambda: self._build_serializer_fields(serializer))
+
+    def _build_serializer_fields(self, serializer):
+        dependencies.record(serializer)
+
         meta = IntrospectorHelper.get_metadata(serializer)
         fields_meta = copy(meta.get('fields', {}))
 
@@ -396,10 +514,9 @@ class DocumentationGenerator(object):
 
             # ENUM options
             if data_type in BaseMethodIntrospector.ENUMS:
-                if isinstance(field.choices, list):
-                    f['enum'] = [k for k, v in field.choices]
-                elif isinstance(field.choices, dict):
-                    f['enum'] = [k for k, v in field.choices.items()]
+                enum = get_enum(field)
+                if enum is not None:
+                    f['enum'] = enum
 
             # Support for complex types
             if rest_framework.VERSION < '3.0.0':
@@ -418,7 +535,10 @@ class DocumentationGenerator(object):
                     f['type'] = field_serializer
                 else:
                     field_serializer = None
-                    data_type = 'string'
+                    # Related values are typed after the model's primary key
+                    if data_type not in BaseMethodIntrospector.PRIMITIVES:
+                        data_type = 'string'
+                    f.pop('format', None)
 
                 if has_many:
                     f['type'] = 'array'
@@ -0,0 +1,76 @@
+"""
+Splits docstrings into the sections documentation is built from: the text,
+the `param -- description` lines and the YAML following a `---` line.
+Each docstring is tokenized once and the result cached.
+"""
+from django.contrib.admindocs.utils import trim_docstring
+from rest_framework.utils import formatting
+
+from .cache import LRUCache
+
+DOCSTRING_CACHE_SIZE = 1024
+
+_parsed = LRUCache(DOCSTRING_CACHE_SIZE)
+
+
+class ParsedDocstring(object):
+    """
+    The sections of a trimmed docstring:
+
+    without_yaml -- the lines before the last `---` line
+    without_params -- the lines before the first `param -- description` line
+    params -- (name, description) of each `param -- description` line
+    yaml -- the dedented lines from the first line starting with `---`, or
+            None
+    head -- the lines before the first `---` line
+    tail -- the lines after the first `---` line, or None
+    """
+    __slots__ = (
+        'without_yaml', 'without_params', 'params', 'yaml', 'head', 'tail',
+    )
+
+    def __init__(self, docstring):
+        lines = trim_docstring(docstring).split('\n')
+
+        first_separator = last_separator = None
+        yaml_start = None
+        first_param = None
+        self.params = []
+
+        for index, raw_line in enumerate(lines):
+            line = raw_line.strip()
+            if line == '---':
+                if first_separator is None:
+                    first_separator = index
+                last_separator = index
+            if yaml_start is None and line.startswith('---'):
+                yaml_start = index
+
+            param = raw_line.split(' -- ')
+            if len(param) == 2:
+                self.params.append((param[0].strip(), param[1].strip()))
+            if first_param is None and ' -- ' in line:
+                first_param = index
+
+        self.without_yaml = '\n'.join(lines[:last_separator])
+        self.without_params = '\n'.join(lines[:first_param])
+        self.yaml = None
+        if yaml_start is not None:
+            self.yaml = formatting.dedent('\n'.join(lines[yaml_start:]))
+
+        if first_separator is None:
+            self.head, self.tail = '\n'.join(lines), None
+        else:
+            self.head = '\n'.join(lines[:first_separator])
+            self.tail = '\n'.join(lines[first_separator + 1:])
+
+
+def parse_docstring(docstring):
+    """
+    Returns the `ParsedDocstring` of a docstring
+    """
+    parsed = _parsed.get(docstring)
+    if parsed is None:
+        parsed = ParsedDocstring(docstring)
+        _parsed.set(docstring, parsed)
+    return parsed
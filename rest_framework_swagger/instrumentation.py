@@ -0,0 +1,133 @@
+"""Named timing spans around the hot paths of documentation generation."""
+import functools
+import threading
+from contextlib import contextmanager
+from timeit import default_timer
+
+from django.conf import settings
+from django.utils import six
+
+import rest_framework_swagger as rfs
+
+from .compat import OrderedDict, import_string
+from .signals import span_finished
+
+TIMINGS_QUERY_PARAM = 'timings'
+
+_local = threading.local()
+_tracers = {}
+
+
+class Timings(object):
+    """
+    Accumulates the time spent in each named span during a request
+    """
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    def add(self, name, duration):
+        total, count = self.phases.get(name, (0.0, 0))
+        self.phases[name] = (total + duration, count + 1)
+
+    def as_dict(self):
+        return OrderedDict(
+            (name, {'duration': round(total * 1000, 3), 'count': count})
+            for name, (total, count) in self.phases.items()
+        )
+
+    def server_timing(self):
+        """
+        Formats the phases as a `Server-Timing` header value
+        """
+        return ', '.join(
+            '%s;dur=%.3f' % (name, total * 1000)
+            for name, (total, _) in self.phases.items()
+        )
+
+
+def start_collecting():
+    _local.timings = Timings()
+    return _local.timings
+
+
+def stop_collecting():
+    timings = get_timings()
+    _local.timings = None
+    return timings
+
+
+def get_timings():
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def collecting_into(timings):
+    """
+    Adds the spans of the enclosed block, run in another thread than the
+    request's, to the request's `Timings`
+    """
+    previous = get_timings()
+    _local.timings = timings
+    try:
+        yield
+    finally:
+        _local.timings = previous
+
+
+def timings_in_body(request):
+    """
+    The `?timings` debug flag adds the breakdown to the response body
+    """
+    return settings.DEBUG and TIMINGS_QUERY_PARAM in request.GET
+
+
+def timing_requested(request):
+    return bool(rfs.SWAGGER_SETTINGS['server_timing']) or \
+        timings_in_body(request)
+
+
+def get_tracer():
+    tracer = rfs.SWAGGER_SETTINGS['tracer']
+    if isinstance(tracer, six.string_types):
+        if tracer not in _tracers:
+            _tracers[tracer] = import_string(tracer)
+        tracer = _tracers[tracer]
+    return tracer
+
+
+@contextmanager
+def span(name):
+    """
+    Times the enclosed block and reports it to the request's `Timings`,
+    the `tracer` setting and the `span_finished` signal
+    """
+    timings = get_timings()
+    tracer = get_tracer()
+    if timings is None and tracer is None and \
+            not span_finished.has_listeners(name):
+        yield
+        return
+
+    start = default_timer()
+    try:
+        yield
+    finally:
+        duration = default_timer() - start
+        if timings is not None:
+            timings.add(name, duration)
+        if tracer is not None:
+            tracer(name, duration)
+        span_finished.send(sender=name, name=name, duration=duration)
+
+
+def traced(name):
+    """
+    Decorator wrapping every call of a function in a named span
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
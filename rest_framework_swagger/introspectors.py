@@ -2,26 +2,41 @@
 
 """Handles the instrospection of REST Framework Views and ViewSets."""
 
+import copy
+import datetime
 import importlib
 import inspect
 import itertools
 import re
+import weakref
 from abc import ABCMeta, abstractmethod
 
 import yaml
 
 import rest_framework
-from django.contrib.admindocs.utils import trim_docstring
+from django.core.exceptions import FieldDoesNotExist
 from django.http import HttpRequest
-from django.utils import six
+from django.utils import six, timezone
 from django.utils.encoding import smart_text
-from rest_framework import fields, viewsets
+from rest_framework import fields, relations, viewsets
 from rest_framework.compat import apply_markdown
 from rest_framework.serializers import ListSerializer
 from rest_framework.utils import formatting
 
-from .compat import OrderedDict, get_pagination_attribures, strip_tags
+import rest_framework_swagger as rfs
+
+from . import dependencies
+from .cache import LRUCache
+from .compat import (
+    OrderedDict,
+    get_pagination_attribures,
+    import_string,
+    strip_tags,
+)
+from .docstrings import parse_docstring
+from .instrumentation import traced
 from .public_api_introspectors import get_class_form_args
+from .records import Parameter
 
 try:
     from rest_framework.fields import CurrentUserDefault
@@ -33,16 +48,121 @@ try:
 except ImportError:
     django_filters = None
 
+DOCSTRING_CACHE_SIZE = 1024
+
+# Rendered docstring fragments. Keys include the description function and
+# the markdown renderer, so changing either never serves stale output.
+_descriptions = LRUCache(DOCSTRING_CACHE_SIZE)
+_summaries = LRUCache(DOCSTRING_CACHE_SIZE)
+_markdown = LRUCache(DOCSTRING_CACHE_SIZE)
+
+
+def get_docstring_renderer():
+    return (
+        rest_framework.settings.api_settings.VIEW_DESCRIPTION_FUNCTION,
+        getattr(formatting, 'apply_markdown', None),
+    )
+
+
+# Description functions which only read the view's `__doc__`, so can be
+# given a DocstringOverride rather than a subclass of the view
+DOCSTRING_ONLY_DESCRIPTION_FUNCTIONS = frozenset([
+    'rest_framework.views.get_view_description',
+    'rest_framework_swagger.views.get_restructuredtext',
+])
+
+
+class DocstringOverride(object):
+    """
+    Stands in for a view class whose docstring is overridden, so the
+    description function can render `docstring` without a subclass of the
+    view being created. Other attributes are looked up on the view, and
+    `__bases__` and `__mro__` make `issubclass` checks against the view's
+    classes succeed as they would for a subclass. It is not a class itself,
+    so is only given to DOCSTRING_ONLY_DESCRIPTION_FUNCTIONS.
+    """
+    def __init__(self, view_cls, docstring):
+        self.view_cls = view_cls
+        self.__doc__ = docstring
+        self.__name__ = getattr(view_cls, '__name__', '')
+        self.__qualname__ = getattr(view_cls, '__qualname__', self.__name__)
+        self.__module__ = getattr(view_cls, '__module__', None)
+        self.__bases__ = (view_cls,)
+        self.__mro__ = (self,) + tuple(getattr(view_cls, '__mro__', ()))
+
+    def __getattr__(self, name):
+        # Only called for missing attributes: view_cls is missing while the
+        # override is copied or unpickled, and special names are looked up
+        # by those protocols, which must not reach the view
+        if name == 'view_cls' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.view_cls, name)
+
+
+def override_docstring(view_cls, docstring, description_function):
+    """
+    Returns a stand-in for the view class with `docstring` as its docstring,
+    for `description_function` to render
+    """
+    function_name = '%s.%s' % (
+        getattr(description_function, '__module__', None),
+        getattr(description_function, '__name__', None))
+    if function_name in DOCSTRING_ONLY_DESCRIPTION_FUNCTIONS:
+        return DocstringOverride(view_cls, docstring)
+    # Other functions may inspect the view as a class
+    return type(view_cls.__name__ + '_fake', (view_cls,),
+                {'__doc__': docstring})
 
 
 def get_view_description(view_cls, html=False, docstring=None):
-    if docstring is not None:
-        view_cls = type(
-            view_cls.__name__ + '_fake',
-            (view_cls,),
-            {'__doc__': docstring})
-    return rest_framework.settings.api_settings \
-        .VIEW_DESCRIPTION_FUNCTION(view_cls, html)
+    renderer = get_docstring_renderer()
+    key = (renderer, html, view_cls, docstring)
+    description = _descriptions.get(key)
+    if description is None:
+        if docstring is not None:
+            view_cls = override_docstring(view_cls, docstring, renderer[0])
+        description = renderer[0](view_cls, html)
+        _descriptions.set(key, description)
+    return description
+
+
+# Callables documented by the format of the value they return in the
+# `safe_default_values` mode, rather than by their dotted path
+SAFE_DEFAULT_CALLABLES = (
+    (datetime.datetime.now, 'date-time'),
+    (datetime.datetime.utcnow, 'date-time'),
+    (datetime.date.today, 'date'),
+    (timezone.now, 'date-time'),
+)
+
+
+def get_safe_default_format(value):
+    """
+    Returns the format documenting a callable of SAFE_DEFAULT_CALLABLES, or
+    None. Callables are compared by identity, as they may not be hashable;
+    bound methods, which are built on each access, by their owner and name.
+    """
+    for safe_callable, value_format in SAFE_DEFAULT_CALLABLES:
+        if value is safe_callable:
+            return value_format
+        owner = getattr(safe_callable, '__self__', None)
+        if owner is not None and \
+                getattr(value, '__self__', None) is owner and \
+                getattr(value, '__name__', None) == safe_callable.__name__:
+            return value_format
+    return None
+
+
+def get_callable_name(value):
+    """
+    Returns the dotted path of a function, method or callable instance
+    """
+    if not hasattr(value, '__name__'):
+        value = value.__class__
+    module = getattr(value, '__module__', None) or \
+        getattr(getattr(value, '__self__', None), '__module__', None)
+    name = getattr(value, '__qualname__', value.__name__)
+    return '%s.%s' % (module, name) if module else name
 
 
 def get_default_value(field):
@@ -54,7 +174,11 @@ def get_default_value(field):
     if callable(default_value):
         if CurrentUserDefault is not None and isinstance(default_value,
                                                          CurrentUserDefault):
-            default_value.user = None
+            # The user making the request, which is unknown here
+            return None
+        if rfs.SWAGGER_SETTINGS['safe_default_values']:
+            return get_safe_default_format(default_value) or \
+                get_callable_name(default_value)
         default_value = default_value()
     return default_value
 
@@ -67,19 +191,7 @@ class IntrospectorHelper(object):
         """
         Strips YAML from the docstring.
         """
-        split_lines = trim_docstring(docstring).split('\n')
-
-        cut_off = None
-        for index in range(len(split_lines) - 1, -1, -1):
-            line = split_lines[index]
-            line = line.strip()
-            if line == '---':
-                cut_off = index
-                break
-        if cut_off is not None:
-            split_lines = split_lines[0:cut_off]
-
-        return "\n".join(split_lines)
+        return parse_docstring(docstring).without_yaml
 
     @staticmethod
     def strip_params_from_docstring(docstring):
@@ -87,19 +199,7 @@ class IntrospectorHelper(object):
         Strips the params from the docstring (ie. myparam -- Some param) will
         not be removed from the text body
         """
-        params_pattern = re.compile(r' -- ')
-        split_lines = trim_docstring(docstring).split('\n')
-
-        cut_off = None
-        for index, line in enumerate(split_lines):
-            line = line.strip()
-            if params_pattern.search(line):
-                cut_off = index
-                break
-        if cut_off is not None:
-            split_lines = split_lines[0:cut_off]
-
-        return "\n".join(split_lines)
+        return parse_docstring(docstring).without_params
 
     @staticmethod
     def _flatten_metadata(data):
@@ -156,6 +256,11 @@ class IntrospectorHelper(object):
         """
         Returns the first sentence of the first line of the class docstring
         """
+        key = (get_docstring_renderer(), callback, docstring)
+        summary = _summaries.get(key)
+        if summary is not None:
+            return summary
+
         description = get_view_description(
             callback, html=False, docstring=docstring) \
             .split("\n")[0].split(".")[0]
@@ -163,9 +268,10 @@ class IntrospectorHelper(object):
             description)
         description = IntrospectorHelper.strip_params_from_docstring(
             description)
-        description = strip_tags(get_view_description(
+        summary = strip_tags(get_view_description(
             callback, html=True, docstring=description))
-        return description
+        _summaries.set(key, summary)
+        return summary
 
 
 class BaseViewIntrospector(object):
@@ -202,10 +308,10 @@ class BaseViewIntrospector(object):
 class BaseMethodIntrospector(object):
     __metaclass__ = ABCMeta
 
-    ENUMS = [
+    ENUMS = frozenset([
         'choice',
         'multiple choice',
-    ]
+    ])
 
     PRIMITIVES = {
         'integer': ['int32', 'int64'],
@@ -312,6 +418,7 @@ class BaseMethodIntrospector(object):
         return rest_framework.settings.api_settings \
             .VIEW_NAME_FUNCTION(self.callback, self.method).replace(' ', '_')
 
+    @traced('notes')
     def get_notes(self):
         """
         Returns the body of the docstring trimmed before any parameters are
@@ -395,11 +502,11 @@ class BaseMethodIntrospector(object):
         if serializer_name is None:
             return
 
-        return {
-            'name': serializer_name,
-            'type': serializer_name,
-            'paramType': 'body',
-        }
+        return Parameter(
+            name=serializer_name,
+            type=serializer_name,
+            paramType='body',
+        )
 
     def build_path_parameters(self):
         """
@@ -409,12 +516,12 @@ class BaseMethodIntrospector(object):
         params = []
 
         for param in url_params:
-            params.append({
-                'name': param,
-                'type': 'string',
-                'paramType': 'path',
-                'required': True
-            })
+            params.append(Parameter(
+                name=param,
+                type='string',
+                paramType='path',
+                required=True,
+            ))
 
         return params
 
@@ -427,15 +534,11 @@ class BaseMethodIntrospector(object):
         if docstring is None:
             return params
 
-        split_lines = docstring.split('\n')
-
-        for line in split_lines:
-            param = line.split(' -- ')
-            if len(param) == 2:
-                params.append({'paramType': 'query',
-                               'name': param[0].strip(),
-                               'description': param[1].strip(),
-                               'type': 'string'})
+        for name, description in parse_docstring(docstring).params:
+            params.append(Parameter(paramType='query',
+                                    name=name,
+                                    description=description,
+                                    type='string'))
 
         params += get_class_form_args(self.method, self.callback, self.version)
 
@@ -445,26 +548,12 @@ class BaseMethodIntrospector(object):
         """
         introspect ``django_filters.FilterSet`` instances.
         """
-        params = []
         filter_class = getattr(self.callback, 'filter_class', None)
         if (filter_class is not None and
                 issubclass(filter_class, django_filters.FilterSet)):
-            for name, filter_ in filter_class.base_filters.items():
-                data_type = 'string'
-                parameter = {
-                    'paramType': 'query',
-                    'name': name,
-                    'description': filter_.label,
-                }
-                normalize_data_format(data_type, None, parameter)
-                multiple_choices = filter_.extra.get('choices', {})
-                if multiple_choices:
-                    parameter['enum'] = [choice[0] for choice
-                                         in itertools.chain(multiple_choices)]
-                    parameter['type'] = 'enum'
-                params.append(parameter)
+            return copy.deepcopy(get_filter_parameters(filter_class))
 
-        return params
+        return []
 
     def build_form_parameters(self):
         """
@@ -492,15 +581,15 @@ class BaseMethodIntrospector(object):
             # if data_type in self.PRIMITIVES:
                 # data_format = self.PRIMITIVES.get(data_type)[0]
 
-            f = {
-                'paramType': 'form',
-                'name': name,
-                'description': getattr(field, 'help_text', '') or '',
-                'type': data_type,
-                'format': data_format,
-                'required': getattr(field, 'required', False),
-                'defaultValue': get_default_value(field),
-            }
+            f = Parameter(
+                paramType='form',
+                name=name,
+                description=getattr(field, 'help_text', '') or '',
+                type=data_type,
+                format=data_format,
+                required=getattr(field, 'required', False),
+                defaultValue=get_default_value(field),
+            )
 
             # Swagger type is a primitive, format is more specific
             if f['type'] == f['format']:
@@ -521,10 +610,9 @@ class BaseMethodIntrospector(object):
 
             # ENUM options
             if data_type in BaseMethodIntrospector.ENUMS:
-                if isinstance(field.choices, list):
-                    f['enum'] = [k for k, v in field.choices]
-                elif isinstance(field.choices, dict):
-                    f['enum'] = [k for k, v in field.choices.items()]
+                enum = get_enum(field)
+                if enum is not None:
+                    f['enum'] = enum
 
             data.append(f)
 
@@ -541,14 +629,222 @@ DATA_TYPES_MAP = OrderedDict([
     (fields.FloatField, ('number', 'float')),
     (fields.DictField, ('dict', 'dict')),
     (fields.HiddenField, ('hidden', 'hidden')),
+    (relations.RelatedField, ('related', 'related')),
+    (relations.ManyRelatedField, ('related', 'related')),
 ])
 
 
+# The settings generation the cache was filled under, and field class ->
+# (type, format) filled in the first time each class is seen
+_data_types = (None, {})
+
+
+def get_data_types_map():
+    """
+    Returns DATA_TYPES_MAP extended with the `data_types` setting
+    """
+    data_types = dict(DATA_TYPES_MAP)
+    for field_class, representation in \
+            rfs.SWAGGER_SETTINGS['data_types'].items():
+        if isinstance(field_class, six.string_types):
+            field_class = import_string(field_class)
+        data_types[field_class] = tuple(representation)
+    return data_types
+
+
+def resolve_data_type(field_class):
+    """
+    Returns the representation registered for the closest class in the
+    field class's MRO
+    """
+    data_types = get_data_types_map()
+    for klass in inspect.getmro(field_class):
+        if klass in data_types:
+            return data_types[klass]
+
+    return 'string', 'string'
+
+
 def get_data_type(field):
-    for field_class, repreentation in DATA_TYPES_MAP.items():
-        if isinstance(field, field_class):
-            return repreentation
+    global _data_types
+    generation, data_types = _data_types
+    current_generation = rfs.SWAGGER_SETTINGS.generation
+    if generation != current_generation:
+        data_types = {}
+        _data_types = (current_generation, data_types)
+
+    field_class = field.__class__
+    try:
+        representation = data_types[field_class]
+    except KeyError:
+        representation = data_types[field_class] = \
+            resolve_data_type(field_class)
+
+    if representation[0] == 'related':
+        return get_related_data_type(field)
+    return representation
+
+
+def get_related_data_type(field):
+    """
+    Returns the (type, format) of the values of a related field, taken from
+    the model of its queryset, which is never evaluated
+    """
+    if isinstance(field, relations.ManyRelatedField):
+        field = field.child_relation
+
+    pk_field = getattr(field, 'pk_field', None)
+    if pk_field is not None:
+        return get_data_type(pk_field)
 
+    model = getattr(getattr(field, 'queryset', None), 'model', None)
+    if model is None or isinstance(field, relations.HyperlinkedRelatedField):
+        return 'string', 'string'
+
+    if isinstance(field, relations.SlugRelatedField):
+        try:
+            return get_model_field_data_type(
+                model._meta.get_field(field.slug_field))
+        except FieldDoesNotExist:
+            return 'string', 'string'
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        return get_model_field_data_type(model._meta.pk)
+    return 'string', 'string'
+
+
+def get_enum(field):
+    """
+    Returns the values of a choice field, or None when they are more than
+    the `enum_max_size` setting allows. The choices of related fields come
+    from the database, so are never listed.
+    """
+    if isinstance(field, (relations.RelatedField, relations.ManyRelatedField)):
+        return None
+
+    choices = field.choices
+    if isinstance(choices, dict):
+        enum = list(choices.keys())
+    elif isinstance(choices, list):
+        enum = [key for key, value in choices]
+    else:
+        return None
+
+    max_size = rfs.SWAGGER_SETTINGS['enum_max_size']
+    if max_size is not None and len(enum) > max_size:
+        return None
+    return enum
+
+
+# django-filter Filter class -> (type, format) of its query parameters
+FILTER_TYPES_MAP = OrderedDict(
+    (getattr(django_filters, name), representation)
+    for name, representation in (
+        ('NumberFilter', ('number', 'double')),
+        ('BooleanFilter', ('boolean', 'boolean')),
+        ('DateFilter', ('string', 'date')),
+        ('DateTimeFilter', ('string', 'date-time')),
+        ('RangeFilter', ('number', 'double')),
+        ('DateFromToRangeFilter', ('string', 'date')),
+        ('DateTimeFromToRangeFilter', ('string', 'date-time')),
+    )
+    if hasattr(django_filters, name)
+)
+
+# FilterSet class -> its query parameters, built the first time it is seen
+_filter_parameters = weakref.WeakKeyDictionary()
+
+
+def get_filter_parameters(filter_class):
+    """
+    Returns the query parameters of a FilterSet. They are shared by every
+    view using it, so must be deep copied before being changed.
+    """
+    try:
+        return _filter_parameters[filter_class]
+    except KeyError:
+        params = _filter_parameters[filter_class] = normalize_data_formats([
+            param
+            for name, filter_ in filter_class.base_filters.items()
+            for param in build_filter_parameters(name, filter_)
+        ])
+        return params
+
+
+def build_filter_parameters(name, filter_):
+    """
+    Builds the query parameters of a single filter. Range filters take one
+    parameter per bound.
+    """
+    parameter = Parameter(
+        paramType='query',
+        name=name,
+        description=filter_.label,
+        type='string',
+    )
+
+    for klass in inspect.getmro(filter_.__class__):
+        if klass in FILTER_TYPES_MAP:
+            parameter['type'], parameter['format'] = FILTER_TYPES_MAP[klass]
+            break
+
+    if isinstance(filter_, (django_filters.ModelChoiceFilter,
+                            django_filters.ModelMultipleChoiceFilter)):
+        # Choices come from the database, so only their type is documented.
+        # Values are looked up by to_field_name, or the primary key.
+        queryset = filter_.extra.get('queryset')
+        if queryset is not None and not callable(queryset):
+            to_field_name = filter_.extra.get('to_field_name')
+            try:
+                if to_field_name:
+                    model_field = queryset.model._meta.get_field(
+                        to_field_name)
+                else:
+                    model_field = queryset.model._meta.pk
+                parameter['type'], parameter['format'] = \
+                    get_model_field_data_type(model_field)
+            except FieldDoesNotExist:
+                # e.g. a lookup across a relation, such as `user__email`
+                parameter['type'], parameter['format'] = 'string', 'string'
+    else:
+        multiple_choices = filter_.extra.get('choices', {})
+        if multiple_choices and not callable(multiple_choices):
+            parameter['enum'] = [choice[0] for choice
+                                 in itertools.chain(multiple_choices)]
+            parameter['type'] = 'enum'
+
+    if isinstance(filter_, (django_filters.MultipleChoiceFilter,
+                            django_filters.ModelMultipleChoiceFilter)):
+        parameter['allowMultiple'] = True
+
+    if isinstance(filter_, django_filters.RangeFilter):
+        widget = getattr(filter_.field_class, 'widget', None)
+        suffixes = getattr(widget, 'suffixes', None) or ('0', '1')
+        bounds = []
+        for suffix in suffixes:
+            bound = parameter.copy()
+            bound['name'] = '%s_%s' % (name, suffix) if suffix else name
+            bounds.append(bound)
+        return bounds
+
+    return [parameter]
+
+
+INTEGER_MODEL_FIELDS = frozenset([
+    'AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField',
+    'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+])
+
+
+def get_model_field_data_type(model_field):
+    """
+    Returns the (type, format) of the values of a model field, following
+    relations to the field they point at
+    """
+    while getattr(model_field, 'related_model', None) is not None:
+        model_field = model_field.related_model._meta.pk
+
+    if model_field.get_internal_type() in INTEGER_MODEL_FIELDS:
+        return 'integer', 'int64'
     return 'string', 'string'
 
 
@@ -573,6 +869,7 @@ class WrappedAPIViewIntrospector(BaseViewIntrospector):
     def methods(self):
         return self.callback().allowed_methods
 
+    @traced('notes')
     def get_notes(self):
         class_docs = get_view_description(self.callback)
         class_docs = IntrospectorHelper.strip_yaml_from_docstring(
@@ -583,12 +880,18 @@ class WrappedAPIViewIntrospector(BaseViewIntrospector):
             self.callback, html=True, docstring=class_docs)
 
 
+@traced('markdown')
 def do_markdown(docstring):
-    # Markdown is optional
-    if apply_markdown:
-        return apply_markdown(docstring)
-    else:
-        return docstring.replace("\n\n", "<br/>")
+    key = (apply_markdown, docstring)
+    html = _markdown.get(key)
+    if html is None:
+        # Markdown is optional
+        if apply_markdown:
+            html = apply_markdown(docstring)
+        else:
+            html = docstring.replace("\n\n", "<br/>")
+        _markdown.set(key, html)
+    return html
 
 
 class APIViewMethodIntrospector(BaseMethodIntrospector):
@@ -637,6 +940,7 @@ class ViewSetIntrospector(BaseViewIntrospector):
         if not issubclass(callback, viewsets.ViewSetMixin):
             raise Exception("wrong callback passed to ViewSetIntrospector")
         self.patterns = patterns or [pattern]
+        self._methods = None
 
     def __iter__(self):
         methods = self._resolve_methods()
@@ -649,33 +953,61 @@ class ViewSetIntrospector(BaseViewIntrospector):
             )
 
     def methods(self):
-        stuff = []
-        for pattern in self.patterns:
-            if pattern.callback:
-                stuff.extend(self._resolve_methods(pattern).values())
-        return stuff
+        if self._methods is None:
+            stuff = []
+            for pattern in self.patterns:
+                if pattern.callback:
+                    stuff.extend(self._resolve_methods(pattern).values())
+            self._methods = stuff
+        return self._methods
 
     def _resolve_methods(self, pattern=None):
-        from .decorators import closure_n_code, get_closure_var
         if pattern is None:
             pattern = self.pattern
-        callback = pattern.callback
+        return resolve_viewset_actions(pattern.callback)
 
-        try:
-            x = closure_n_code(callback)
 
-            while getattr(x.code, 'co_name') != 'view':
-                # lets unwrap!
-                callback = get_closure_var(callback)
-                x = closure_n_code(callback)
+# ViewSet `as_view()` callback -> its {http method: action} mapping
+_viewset_actions = weakref.WeakKeyDictionary()
 
-            freevars = x.code.co_freevars
-        except (AttributeError, IndexError):
-            raise RuntimeError(
-                'Unable to use callback invalid closure/function ' +
-                'specified.')
-        else:
-            return x.closure[freevars.index('actions')].cell_contents
+
+def resolve_viewset_actions(callback):
+    """
+    Returns the actions a ViewSet callback was bound to, read from
+    `callback.actions` where REST Framework sets it and otherwise unwrapped
+    from the `as_view()` closure
+    """
+    try:
+        return _viewset_actions[callback]
+    except KeyError:
+        pass
+
+    actions = getattr(callback, 'actions', None)
+    if actions is None:
+        actions = _unwrap_viewset_actions(callback)
+
+    _viewset_actions[callback] = actions
+    return actions
+
+
+def _unwrap_viewset_actions(callback):
+    from .decorators import closure_n_code, get_closure_var
+
+    try:
+        x = closure_n_code(callback)
+
+        while getattr(x.code, 'co_name') != 'view':
+            # lets unwrap!
+            callback = get_closure_var(callback)
+            x = closure_n_code(callback)
+
+        freevars = x.code.co_freevars
+    except (AttributeError, IndexError):
+        raise RuntimeError(
+            'Unable to use callback invalid closure/function ' +
+            'specified.')
+    else:
+        return x.closure[freevars.index('actions')].cell_contents
 
 
 class ViewSetMethodIntrospector(BaseMethodIntrospector):
@@ -711,18 +1043,18 @@ class ViewSetMethodIntrospector(BaseMethodIntrospector):
         if self.method == 'list' and page_size:
             data_type = 'integer'
             if page_query_param:
-                parameters.append({
-                    'paramType': 'query',
-                    'name': page_query_param,
-                    'description': None,
-                })
+                parameters.append(Parameter(
+                    paramType='query',
+                    name=page_query_param,
+                    description=None,
+                ))
                 normalize_data_format(data_type, None, parameters[-1])
             if page_size_query_param:
-                parameters.append({
-                    'paramType': 'query',
-                    'name': page_size_query_param,
-                    'description': None,
-                })
+                parameters.append(Parameter(
+                    paramType='query',
+                    name=page_size_query_param,
+                    description=None,
+                ))
                 normalize_data_format(data_type, None, parameters[-1])
         return parameters
 
@@ -747,6 +1079,17 @@ def multi_getattr(obj, attr, default=None):
     return obj
 
 
+# Every valid primitive format, and the format each primitive type defaults to
+PRIMITIVE_FORMATS = frozenset(
+    data_format for formats in BaseMethodIntrospector.PRIMITIVES.values()
+    for data_format in formats
+)
+DEFAULT_FORMATS = dict(
+    (data_type, formats[0])
+    for data_type, formats in BaseMethodIntrospector.PRIMITIVES.items()
+)
+
+
 def normalize_data_format(data_type, data_format, obj):
     """
     sets 'type' on obj
@@ -755,28 +1098,52 @@ def normalize_data_format(data_type, data_format, obj):
     """
     if data_type == 'array':
         data_format = None
+    elif data_format not in PRIMITIVE_FORMATS:
+        data_format = DEFAULT_FORMATS.get(data_type)
 
-    flatten_primitives = [
-        val for sublist in BaseMethodIntrospector.PRIMITIVES.values()
-        for val in sublist
-    ]
-
-    if data_format not in flatten_primitives:
-        formats = BaseMethodIntrospector.PRIMITIVES.get(data_type, None)
-        if formats:
-            data_format = formats[0]
-        else:
-            data_format = None
     if data_format == data_type:
         data_format = None
 
     obj['type'] = data_type
-    if data_format is None and 'format' in obj:
-        del obj['format']
-    elif data_format is not None:
+    if data_format is None:
+        obj.pop('format', None)
+    else:
         obj['format'] = data_format
 
 
+def normalize_data_formats(objs):
+    """
+    Normalizes the 'type' and 'format' of a list of parameter dicts in place,
+    like normalize_data_format does for each of them
+    """
+    primitive_formats = PRIMITIVE_FORMATS
+    default_formats = DEFAULT_FORMATS
+
+    for obj in objs:
+        data_type = obj['type']
+        data_format = obj.get('format')
+        if data_type == 'array':
+            data_format = None
+        elif data_format not in primitive_formats:
+            data_format = default_formats.get(data_type)
+
+        if data_format is None or data_format == data_type:
+            obj.pop('format', None)
+        else:
+            obj['format'] = data_format
+
+    return objs
+
+
+class ClassNotFound(Exception):
+    pass
+
+
+# (class path, module it is resolved from) -> class, or the ClassNotFound
+# raised looking it up, so failed lookups are not retried either
+_loaded_classes = {}
+
+
 class YAMLDocstringParser(object):
     """
     Docstring parser powered by YAML syntax
@@ -931,21 +1298,13 @@ class YAMLDocstringParser(object):
         if self.object is None:
             self.object = {}
 
+    @traced('yaml')
     def load_obj_from_docstring(self, docstring):
         """Loads YAML from docstring"""
-        split_lines = trim_docstring(docstring).split('\n')
-
-        # Cut YAML from rest of docstring
-        for index, line in enumerate(split_lines):
-            line = line.strip()
-            if line.startswith('---'):
-                cut_from = index
-                break
-        else:
+        yaml_string = parse_docstring(docstring).yaml
+        if yaml_string is None:
             return None
 
-        yaml_string = "\n".join(split_lines[cut_from:])
-        yaml_string = formatting.dedent(yaml_string)
         try:
             return yaml.load(yaml_string)
         except yaml.YAMLError as e:
@@ -959,12 +1318,31 @@ class YAMLDocstringParser(object):
         if not cls_path or not callback or not hasattr(callback, '__module__'):
             return None
 
+        origin = self.method_introspector.get_module()
+        key = (cls_path, origin)
+        try:
+            class_obj = _loaded_classes[key]
+        except KeyError:
+            try:
+                class_obj = self._find_class(cls_path, origin)
+            except ClassNotFound as e:
+                class_obj = e
+            _loaded_classes[key] = class_obj
+
+        if isinstance(class_obj, ClassNotFound):
+            raise ClassNotFound(*class_obj.args)
+
+        dependencies.record(class_obj)
+        return class_obj
+
+    @staticmethod
+    def _find_class(cls_path, origin):
         package = None
 
         if '.' not in cls_path:
             # within current module/file
             class_name = cls_path
-            module_path = self.method_introspector.get_module()
+            module_path = origin
         else:
             # relative or fully qualified path import
             class_name = cls_path.split('.')[-1]
@@ -973,7 +1351,7 @@ class YAMLDocstringParser(object):
             if cls_path.startswith('.'):
                 # relative lookup against current package
                 # ..serializers.FooSerializer
-                package = self.method_introspector.get_module()
+                package = origin
 
         class_obj = None
         # Try to perform local or relative/fq import
@@ -988,11 +1366,10 @@ class YAMLDocstringParser(object):
         # serializer: submodule.FooSerializer
         if class_obj is None:
             try:
-                module = importlib.import_module(
-                    self.method_introspector.get_module())
+                module = importlib.import_module(origin)
                 class_obj = multi_getattr(module, cls_path, None)
             except (ImportError, AttributeError):
-                raise Exception("Could not find %s, looked in %s" % (cls_path, module))
+                raise ClassNotFound("Could not find %s, looked in %s" % (cls_path, module))
 
         return class_obj
 
@@ -1090,6 +1467,7 @@ class YAMLDocstringParser(object):
         Retrieves parameters from YAML object
         """
         params = []
+        array_items = []
         fields = self.object.get('parameters', [])
         for field in fields:
             param_type = field.get('paramType', None)
@@ -1116,14 +1494,14 @@ class YAMLDocstringParser(object):
             # Data Format
             data_format = field.get('format', None)
 
-            f = {
-                'paramType': param_type,
-                'name': field.get('name', None),
-                'description': field.get('description', ''),
-                'required': field.get('required', False),
-            }
-
-            normalize_data_format(data_type, data_format, f)
+            f = Parameter(
+                paramType=param_type,
+                name=field.get('name', None),
+                description=field.get('description', ''),
+                required=field.get('required', False),
+                type=data_type,
+                format=data_format,
+            )
 
             if field.get('defaultValue', None) is not None:
                 f['defaultValue'] = field.get('defaultValue', None)
@@ -1137,8 +1515,10 @@ class YAMLDocstringParser(object):
                 elt_data_type = items.get('type', 'string')
                 elt_data_format = items.get('type', 'format')
                 f['items'] = {
+                    'type': elt_data_type,
+                    'format': elt_data_format,
                 }
-                normalize_data_format(elt_data_type, elt_data_format, f['items'])
+                array_items.append(f['items'])
 
                 uniqueItems = field.get('uniqueItems', None)
                 if uniqueItems is not None:
@@ -1162,7 +1542,8 @@ class YAMLDocstringParser(object):
 
             params.append(f)
 
-        return params
+        normalize_data_formats(array_items)
+        return normalize_data_formats(params)
 
     def discover_parameters(self, inspector):
         """
@@ -1174,18 +1555,26 @@ class YAMLDocstringParser(object):
         method_params = inspector.get_parameters()
 
         # paramType may differ, overwrite first
-        # so strategy can be applied
+        # so strategy can be applied. The last docstring parameter of a
+        # name wins.
+        docstring_param_types = dict(
+            (doc_param['name'], doc_param['paramType'])
+            for doc_param in docstring_params if 'paramType' in doc_param
+        )
         for meth_param in method_params:
-            for doc_param in docstring_params:
-                if doc_param['name'] == meth_param['name']:
-                    if 'paramType' in doc_param:
-                        meth_param['paramType'] = doc_param['paramType']
+            if meth_param['name'] in docstring_param_types:
+                meth_param['paramType'] = \
+                    docstring_param_types[meth_param['name']]
 
+        method_params = self._group_params(method_params)
+        docstring_params = self._group_params(docstring_params)
         for param_type in self.PARAM_TYPES:
             if self.should_omit_parameters(param_type):
                 continue
             parameters += self._apply_strategy(
-                param_type, method_params, docstring_params
+                param_type,
+                method_params.get(param_type, []),
+                docstring_params.get(param_type, []),
             )
 
         # PATCH requests expects all fields except path fields to be optional
@@ -1210,19 +1599,10 @@ class YAMLDocstringParser(object):
 
     def _apply_strategy(self, param_type, method_params, docstring_params):
         """
-        Applies strategy for subset of parameters filtered by `paramType`
+        Applies strategy for the parameters of a `paramType`, as grouped by
+        `_group_params`
         """
         strategy = self.get_parameters_strategy(param_type=param_type)
-        method_params = self._filter_params(
-            params=method_params,
-            key='paramType',
-            val=param_type
-        )
-        docstring_params = self._filter_params(
-            params=docstring_params,
-            key='paramType',
-            val=param_type
-        )
 
         if strategy == 'replace':
             return docstring_params or method_params
@@ -1236,13 +1616,14 @@ class YAMLDocstringParser(object):
         return []
 
     @staticmethod
-    def _filter_params(params, key, val):
+    def _group_params(params):
         """
-        Returns filter function for parameters structure
+        Groups parameters by `paramType`, preserving their order
         """
-        def filter_by(o):
-            return o.get(key, None) == val
-        return filter(filter_by, params)
+        groups = {}
+        for param in params:
+            groups.setdefault(param.get('paramType'), []).append(param)
+        return groups
 
     @staticmethod
     def _merge_params(params1, params2, key):
@@ -1250,7 +1631,6 @@ class YAMLDocstringParser(object):
         Helper method.
         Merges parameters lists by key
         """
-        import itertools
         merged = OrderedDict()
         for item in itertools.chain(params1, params2):
             merged[item[key]] = item
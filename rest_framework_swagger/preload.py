@@ -0,0 +1,106 @@
+"""
+Generates the documentation of every resource ahead of time, so a server
+which loads the application before forking its workers (e.g. gunicorn with
+`preload_app`) shares a single copy of it between them.
+"""
+import functools
+
+from django.utils import translation
+
+import rest_framework_swagger as rfs
+
+from .cache import SpecStore, set_spec_store
+from .compat import import_string
+from .concurrency import run_generation, futures
+from .docgenerator import DocumentationGenerator
+from .urlparser import UrlParser
+from .views import SwaggerApiView
+
+
+def preload_specs(urlconf=None, versions=None, for_user=None, workers=None):
+    """
+    Renders the API declaration of every resource of each version into a
+    `SpecStore` which `SwaggerApiView` serves from
+
+    urlconf -- module or module path of the URL patterns (optional)
+    versions -- versions to document, defaults to all available (optional)
+    for_user -- user to document the APIs for, defaults to the
+                `unauthenticated_user` setting (optional)
+    workers -- number of threads rendering versions in parallel (optional)
+    """
+    if versions is None:
+        version_resolver = import_string(
+            rfs.SWAGGER_SETTINGS['version_resolver'])
+        versions = version_resolver.available_versions
+    versions = list(versions)
+
+    # Declarations are only served in the language and settings they were
+    # rendered in
+    language = translation.get_language()
+    generation = rfs.SWAGGER_SETTINGS.generation
+
+    # Models do not depend on the version, so are introspected only once
+    shared_models = {}
+    render = functools.partial(
+        render_version, urlconf=urlconf, for_user=for_user,
+        shared_models=shared_models)
+
+    if workers and futures is not None and len(versions) > 1:
+        with futures.ThreadPoolExecutor(workers) as executor:
+            rendered = list(executor.map(
+                lambda version: run_generation(
+                    functools.partial(render, version), language),
+                versions))
+    else:
+        rendered = [render(version) for version in versions]
+
+    chunks = []
+    index = {}
+    offset = 0
+    user_key = None
+
+    for version, (resources, version_user_key) in zip(versions, rendered):
+        user_key = version_user_key or user_key
+        for resource, body, api_paths in resources:
+            index[(version, resource)] = (
+                offset, len(body), api_paths, language, generation)
+            chunks.append(body)
+            offset += len(body)
+
+    store = SpecStore(b''.join(chunks), index, user_key)
+    set_spec_store(store)
+    return store
+
+
+def render_version(version, urlconf=None, for_user=None, shared_models=None):
+    """
+    Returns the rendered body and api paths of each resource of a version,
+    and the key of the user they were rendered for
+    """
+    urlparser = UrlParser()
+    view = SwaggerApiView()
+    rendered = []
+    user_key = None
+
+    resources = urlparser.get_top_level_apis(urlparser.get_apis(
+        urlconf=urlconf,
+        exclude_namespaces=rfs.SWAGGER_SETTINGS['exclude_namespaces'],
+        version=version,
+    ))
+    for resource in resources:
+        apis = urlparser.get_apis(
+            urlconf=urlconf,
+            filter_path=resource,
+            version=version,
+        )
+        # Generators collect the serializers and response types of the APIs
+        # they document, so each resource needs its own
+        generator = DocumentationGenerator(
+            for_user=for_user, version=version, shared_models=shared_models)
+        user_key = generator.get_user_key()
+
+        body = view.render_declaration_body(generator, apis)
+        rendered.append(
+            (resource, body, tuple(api['path'] for api in apis)))
+
+    return rendered, user_key
@@ -1,29 +1,81 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import copy
+import inspect
+import threading
+from contextlib import contextmanager
+
 import rest_framework_swagger as rfs
 from formencode.api import NoDefault
 
-from .compat import import_string
+from . import dependencies
+from .cache import LRUCache
+from .compat import OrderedDict, import_string
+from .docstrings import parse_docstring
+from .records import Parameter
 
-_version_resolver = None
+FORM_ARGS_CACHE_SIZE = 1024
 
+# The `version_resolver` setting and the resolver it names
+_version_resolver = (None, None)
+_version_resolver_lock = threading.Lock()
 
-def get_class_form_args(method, view_class, version):
+# The version whose forms are being resolved in the current thread
+_context = threading.local()
+
+# (resolver, form class, version, method) -> the versioned form and its
+# parameters, which are deep copied before being returned
+_form_args = LRUCache(FORM_ARGS_CACHE_SIZE)
+
+
+def get_version_resolver():
+    """
+    Returns the resolver named by the `version_resolver` setting, importing
+    it again when the setting changes
+    """
     global _version_resolver
+    dotted_name = rfs.SWAGGER_SETTINGS['version_resolver']
+    if not dotted_name:
+        return None
 
-    if rfs.SWAGGER_SETTINGS['version_resolver'] == \
-            rfs.DEFAULT_SWAGGER_SETTINGS['version_resolver']:
-        return []
+    loaded_name, resolver = _version_resolver
+    if loaded_name != dotted_name:
+        with _version_resolver_lock:
+            loaded_name, resolver = _version_resolver
+            if loaded_name != dotted_name:
+                resolver = import_string(dotted_name)
+                _version_resolver = (dotted_name, resolver)
+    return resolver
+
+
+def get_current_version():
+    """
+    Returns the version forms are being resolved for in this thread, for
+    resolvers which need it outside of `get_form`
+    """
+    return getattr(_context, 'version', None)
+
+
+@contextmanager
+def resolving_version(version):
+    previous = get_current_version()
+    _context.version = version
+    try:
+        yield
+    finally:
+        _context.version = previous
 
-    if not _version_resolver:
-        resolver_dotted_name = rfs.SWAGGER_SETTINGS['version_resolver']
-        if not resolver_dotted_name:
-            return []
 
-        _version_resolver = import_string(resolver_dotted_name)
+def get_class_form_args(method, view_class, version):
+    resolver_dotted_name = rfs.SWAGGER_SETTINGS['version_resolver']
+    if resolver_dotted_name == \
+            rfs.DEFAULT_SWAGGER_SETTINGS['version_resolver']:
+        return []
 
-    _version_resolver.current_version = version
+    version_resolver = get_version_resolver()
+    if version_resolver is None:
+        return []
 
     params = []
     form_classes = view_class.form_classes.get(method.upper())
@@ -31,70 +83,140 @@ def get_class_form_args(method, view_class, version):
     if not isinstance(form_classes, list):
         form_classes = [form_classes]
 
-    forms = [_version_resolver.get_form(version, f) for f in form_classes if f]
-
-    forms = [f for f in forms if getattr(f, 'source', None) != 'path']
-
-    for form in forms:
-        params += _process_form(form)
+    for form_class in form_classes:
+        if not form_class:
+            continue
+
+        key = (resolver_dotted_name, form_class, version, method.upper())
+        cached = _form_args.get(key)
+        if cached is None:
+            with resolving_version(version):
+                form = version_resolver.get_form(version, form_class)
+            if getattr(form, 'source', None) == 'path':
+                cached = (form, [])
+            else:
+                cached = (form, _process_form(form))
+            _form_args.set(key, cached)
+
+        form, form_params = cached
+        dependencies.record(form)
+        params += copy.deepcopy(form_params)
 
     return params
 
 
 def _split_docstring(docstring):
     """
-    Parse docstring, search
+    Splits a docstring at its first `---` line, returning the text before
+    it, and the text after it or None
+    """
+    parsed = parse_docstring(docstring)
+    return parsed.head, parsed.tail
+
+
+def _update_description(field_info, to_add):
+    descr = field_info.get('description') or ''
+    descr += ' ' if descr else ''
+    field_info['description'] = descr + to_add
+
+
+# Validator class, or class name, -> handler documenting its fields
+VALIDATOR_HANDLERS = OrderedDict()
+
+# Validator class -> handler, filled in the first time each class is seen
+_validator_handlers = {}
+
+
+def register_validator(validator, handler=None):
+    """
+    Registers the handler documenting the fields of a formencode validator,
+    and of its subclasses unless they are registered themselves. Handlers
+    are called with the parameter and the field, and update the parameter.
+
+    validator -- validator class, or class name
+    handler -- the handler, when not used as a decorator
+    """
+    def register(handler):
+        VALIDATOR_HANDLERS[validator] = handler
+        _validator_handlers.clear()
+        _form_args.clear()
+        return handler
+
+    if handler is None:
+        return register
+    return register(handler)
+
+
+def resolve_validator_handler(validator_class):
+    """
+    Returns the handler registered for the closest class in the validator
+    class's MRO
     """
-    split_lines = trim_docstring(docstring).split('\n')
+    for klass in inspect.getmro(validator_class):
+        for key in (klass, klass.__name__):
+            if key in VALIDATOR_HANDLERS:
+                return VALIDATOR_HANDLERS[key]
+
 
+def get_validator_handler(field):
+    field_class = field.__class__
     try:
-        index = map(unicode.strip, split_lines).index('---')
-    except ValueError:
-        return '\n'.join(split_lines), None
+        return _validator_handlers[field_class]
+    except KeyError:
+        handler = _validator_handlers[field_class] = \
+            resolve_validator_handler(field_class)
+        return handler
 
-    return '\n'.join(split_lines[:index]), '\n'.join(split_lines[index + 1:])
 
+def _typed(data_type, data_format=None):
+    def handler(field_info, field):
+        field_info['type'] = data_type
+        if data_format is not None:
+            field_info['format'] = data_format
+    return handler
 
-FIELD_TYPE_MAP = {
-    'Number': 'integer',
-    'StringBool': 'boolean',
-    'JSONValidator': 'json',
-    'Set': 'list',
-    'URL': 'url',
-    'OneOf': 'choice',
-    'OrderingValidator': 'choice',
-}
 
+@register_validator('Number')
+@register_validator('Int')
+def _document_range(field_info, field):
+    field_info['type'] = 'integer'
+    if getattr(field, 'min', None) is not None:
+        field_info['minimum'] = field.min
+    if getattr(field, 'max', None) is not None:
+        field_info['maximum'] = field.max
 
-def _update_description(field_info, to_add):
-    descr = field_info.get('description') or ''
-    descr += ' ' if descr else ''
-    field_info['description'] = descr + to_add
 
+@register_validator('OneOf')
+def _document_one_of(field_info, field):
+    field_info['type'] = 'choice'
+    field_info['enum'] = list(field.list)
 
-def get_field_specific_data(field_info, field):
-    field_class_name = field.__class__.__name__
 
-    if field_class_name == 'OneOf':
-        field_info['enum'] = field.list
+@register_validator('OrderingValidator')
+def _document_ordering(field_info, field):
+    options = []
+    for item in field.options:
+        options.append(item)
+        options.append('-' + item)
 
-    elif field_class_name == 'OrderingValidator':
-        options = []
-        for item in field.options:
-            options.append(item)
-            options.append('-' + item)
+    field_info['type'] = 'choice'
+    field_info['enum'] = options
 
-        field_info['enum'] = options
 
-    elif field_class_name == 'CommaSeparatedSet':
-        _update_description(
-            field_info,
-            'Acceptable values: {%s}' % ', '.join(field.allowed_values),
-        )
+@register_validator('CommaSeparatedSet')
+def _document_comma_separated_set(field_info, field):
+    _update_description(
+        field_info,
+        'Acceptable values: {%s}' % ', '.join(field.allowed_values),
+    )
 
 
-def _get_field_type(field):
-    return FIELD_TYPE_MAP.get(field.__class__.__name__, 'string')
+register_validator('StringBool', _typed('boolean'))
+register_validator('Bool', _typed('boolean'))
+register_validator('JSONValidator', _typed('json'))
+register_validator('Set', _typed('list'))
+register_validator('URL', _typed('url'))
+register_validator('DateConverter', _typed('string', 'date'))
 
 
 def _get_field_description(field):
@@ -115,20 +237,22 @@ def _process_form(form):
     params = []
 
     for field_name, field in form.fields.items():
-        field_info = {
-            'name': field_name,
-            'description': _get_field_description(field),
-            'required': field.if_missing is NoDefault,
-            'type': _get_field_type(field),
-            'paramType': 'query' if form.source == 'GET' else 'form',
-        }
+        field_info = Parameter(
+            name=field_name,
+            description=_get_field_description(field),
+            required=field.if_missing is NoDefault,
+            type='string',
+            paramType='query' if form.source == 'GET' else 'form',
+        )
 
         default_value = _get_default_value(field)
         if default_value:
             # None is not allowed here
             field_info['defaultValue'] = default_value
 
-        get_field_specific_data(field_info, field)
+        handler = get_validator_handler(field)
+        if handler is not None:
+            handler(field_info, field)
 
         params.append(field_info)
 
@@ -0,0 +1,206 @@
+"""
+Compact records for the endpoints, operations, parameters and models passed
+between the stages of documentation generation. They support the mapping
+interface of a dict, and are converted to dicts by `to_dict` only when the
+documentation is rendered.
+"""
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+from .compat import OrderedDict
+
+
+class Record(object):
+    """
+    A record with a fixed set of keys held in `__slots__`, supporting the
+    mapping interface of a dict. Keys which were
+    never set are absent, as from a dict. Keys outside the slots are kept
+    in a dict of their own, allocated only when needed.
+    """
+    __slots__ = ('_extra',)
+
+    # Keys held in slots named otherwise, as they clash with dict methods
+    _attributes = {}
+    _keys = {}
+
+    def __init__(self, **fields):
+        self._extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    def _get_slot(self, key):
+        attribute = self._attributes.get(key, key)
+        if attribute in self.__slots__ and attribute not in self._keys or \
+                key in self._attributes:
+            return attribute
+        return None
+
+    def __getitem__(self, key):
+        attribute = self._get_slot(key)
+        if attribute is not None:
+            try:
+                return getattr(self, attribute)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        attribute = self._get_slot(key)
+        if attribute is not None:
+            setattr(self, attribute, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        attribute = self._get_slot(key)
+        if attribute is not None:
+            try:
+                delattr(self, attribute)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def keys(self):
+        keys = [self._keys.get(attribute, attribute)
+                for attribute in self.__slots__ if hasattr(self, attribute)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, *args, **fields):
+        for key, value in dict(*args, **fields).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def copy(self):
+        return self.__class__(**self.as_dict(deep=False))
+
+    def as_dict(self, deep=True):
+        return dict(
+            (key, to_dict(self[key]) if deep else self[key])
+            for key in self.keys()
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.as_dict(deep=False) == dict(
+                (key, other[key]) for key in other.keys())
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.as_dict(deep=False)
+
+    def __setstate__(self, state):
+        self._extra = None
+        for key, value in state.items():
+            self[key] = value
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.as_dict(deep=False))
+
+
+# Records hold no __dict__, so are registered rather than derived from
+# MutableMapping, whose subclasses get one on Python 2
+MutableMapping.register(Record)
+
+
+class Endpoint(Record):
+    __slots__ = ('path', 'pattern', 'callback')
+
+
+class Operation(Record):
+    __slots__ = (
+        'method', 'summary', 'nickname', 'notes', 'type', 'parameters',
+        'responseMessages', 'consumes', 'produces',
+    )
+
+
+class Parameter(Record):
+    __slots__ = (
+        'paramType', 'name', 'description', 'required', 'type', 'format',
+        'defaultValue', 'allowMultiple', 'items_', 'uniqueItems', 'minimum',
+        'maximum', 'enum',
+    )
+    _attributes = {'items': 'items_'}
+    _keys = {'items_': 'items'}
+
+
+class Model(Record):
+    __slots__ = ('id', 'required', 'properties')
+
+
+def to_dict(value):
+    """
+    Converts the records in a structure of lists and dicts to dicts. Lists
+    and dicts without records in them are returned as they are.
+    """
+    if isinstance(value, Record):
+        return value.as_dict()
+
+    if isinstance(value, list):
+        items = [to_dict(item) for item in value]
+        if any(new is not old for new, old in zip(items, value)):
+            return items
+    elif isinstance(value, dict):
+        items = [(key, to_dict(item)) for key, item in value.items()]
+        if any(new is not value[key] for key, new in items):
+            if isinstance(value, OrderedDict):
+                return OrderedDict(items)
+            return dict(items)
+    return value
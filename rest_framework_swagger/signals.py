@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent when an instrumented phase of documentation generation finishes.
+# The sender is the span name, e.g. 'get_apis' or 'markdown'.
+span_finished = Signal(providing_args=['name', 'duration'])
@@ -5,6 +5,10 @@ import os
 import copy
 import os.path
 from mock import Mock, patch
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 from distutils.version import StrictVersion
 try:
     from unittest.case import SkipTest
@@ -483,6 +487,28 @@ class DocumentationGeneratorTest(TestCase, DocumentationGeneratorMixin):
 
         self.assertEqual('POST', operations[0]['method'])
 
+    def test_patterns_grouped_by_callback(self):
+        class MockApiViewSet(ModelViewSet):
+            serializer_class = CommentSerializer
+            model = User
+            queryset = User.objects.all()
+
+        router = DefaultRouter()
+        router.register(r'views', MockApiViewSet)
+        urls = patterns(
+            '',
+            url(r'^', include(router.urls)),
+            url(r'a-view/?$', MockApiView.as_view()),
+        )
+        apis = UrlParser().get_apis(urls)
+        docgen = self.get_documentation_generator()
+
+        index = docgen.get_patterns_by_callback(apis)
+
+        self.assertEqual(2, len(index[MockApiViewSet]))
+        self.assertEqual(1, len(index[MockApiView]))
+        self.assertIs(index, docgen.get_patterns_by_callback(apis))
+
     def test_get_operations_with_no_methods(self):
         class AnAPIView(APIView):
             pass
@@ -972,6 +998,96 @@ class IntrospectorHelperTest(TestCase):
         )
 
 
+class PointField(serializers.CharField):
+    pass
+
+
+class DataTypeTest(TestCase):
+    def test_builtin_fields(self):
+        from .introspectors import get_data_type
+        self.assertEqual(('integer', 'int64'),
+                         get_data_type(serializers.IntegerField()))
+        self.assertEqual(('string', 'date-time'),
+                         get_data_type(serializers.DateTimeField()))
+        self.assertEqual(('choice', 'choice'),
+                         get_data_type(serializers.ChoiceField(['a'])))
+        self.assertEqual(('string', 'string'),
+                         get_data_type(serializers.CharField()))
+
+    def test_subclass_uses_closest_registered_class(self):
+        from .introspectors import get_data_type
+
+        class SmallIntegerField(serializers.IntegerField):
+            pass
+
+        self.assertEqual(('integer', 'int64'),
+                         get_data_type(SmallIntegerField()))
+
+    def test_data_types_setting(self):
+        from .introspectors import get_data_type
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['data_types'] = {
+            'rest_framework_swagger.tests.PointField': ('string', 'wkt'),
+            serializers.DecimalField: ['number', 'double'],
+        }
+        decimal_field = serializers.DecimalField(
+            max_digits=5, decimal_places=2)
+
+        self.assertEqual(('string', 'string'), get_data_type(PointField()))
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            self.assertEqual(('string', 'wkt'), get_data_type(PointField()))
+            self.assertEqual(('number', 'double'),
+                             get_data_type(decimal_field))
+        self.assertEqual(('string', 'string'), get_data_type(PointField()))
+
+
+class NormalizeDataFormatTest(TestCase):
+    cases = [
+        ('integer', None),
+        ('integer', 'int64'),
+        ('integer', 'smokey'),
+        ('number', 'double'),
+        ('string', 'date-time'),
+        ('string', 'string'),
+        ('boolean', None),
+        ('array', 'int32'),
+        ('file', None),
+        ('WriteCommentSerializer', 'int32'),
+    ]
+
+    def test_batch_matches_single(self):
+        from .introspectors import (
+            normalize_data_format,
+            normalize_data_formats,
+        )
+        expected = []
+        for data_type, data_format in self.cases:
+            obj = {'format': 'stale'}
+            normalize_data_format(data_type, data_format, obj)
+            expected.append(obj)
+
+        batch = normalize_data_formats([
+            {'type': data_type, 'format': data_format}
+            for data_type, data_format in self.cases
+        ])
+
+        self.assertEqual(expected, batch)
+
+    def test_batch(self):
+        from .introspectors import normalize_data_formats
+        params = normalize_data_formats([
+            {'name': 'a', 'type': 'integer'},
+            {'name': 'b', 'type': 'string', 'format': 'date'},
+            {'name': 'c', 'type': 'array', 'format': 'int32'},
+        ])
+
+        self.assertEqual([
+            {'name': 'a', 'type': 'integer', 'format': 'int32'},
+            {'name': 'b', 'type': 'string', 'format': 'date'},
+            {'name': 'c', 'type': 'array'},
+        ], params)
+
+
 class ViewSetTestIntrospectorTest(TestCase):
     def test_get_allowed_methods_list(self):
         class MyViewSet(ModelViewSet):
@@ -1024,6 +1140,43 @@ class ViewSetTestIntrospectorTest(TestCase):
         self.assertIn('DELETE', allowed_methods)
         self.assertIn('GET', allowed_methods)
 
+    def test_actions_are_resolved_once_per_callback(self):
+        from . import introspectors
+
+        class MyViewSet(ModelViewSet):
+            serializer_class = CommentSerializer
+            model = User
+
+        callback = MyViewSet.as_view({'get': 'list', 'post': 'create'})
+        # Force the closure unwrapping used for older REST Framework
+        callback.__dict__.pop('actions', None)
+        pattern = url(r'^/api/endpoint$', callback)
+        introspector = ViewSetIntrospector(
+            MyViewSet, '/api/endpoint', pattern, AnonymousUser())
+
+        with patch.object(introspectors, '_unwrap_viewset_actions',
+                          wraps=introspectors._unwrap_viewset_actions) \
+                as unwrap:
+            self.assertEqual(['create', 'list'],
+                             sorted(introspector.methods()))
+            list(introspector)
+            introspector.methods()
+
+        self.assertEqual(1, unwrap.call_count)
+
+    def test_actions_read_from_callback(self):
+        from .introspectors import resolve_viewset_actions
+
+        class MyViewSet(ModelViewSet):
+            serializer_class = CommentSerializer
+            model = User
+
+        callback = MyViewSet.as_view({'get': 'list'})
+        callback.actions = {'get': 'retrieve'}
+
+        self.assertEqual({'get': 'retrieve'},
+                         resolve_viewset_actions(callback))
+
 
 def get_introspectors(introspector):
     return dict((x.method, x) for x in iter(introspector))
@@ -1170,6 +1323,67 @@ class ViewSetMethodIntrospectorTests(TestCase):
                            }
                           ])
 
+    def test_types_parameters_from_django_filters(self):
+        class UserFilter(django_filters.FilterSet):
+            id = django_filters.NumberFilter()
+            is_staff = django_filters.BooleanFilter()
+            joined = django_filters.DateFilter(name='date_joined')
+            logins = django_filters.RangeFilter(name='id')
+            groups = django_filters.ModelChoiceFilter(
+                queryset=User.objects.all())
+            friend = django_filters.ModelChoiceFilter(
+                queryset=User.objects.all(), to_field_name='username')
+            group = django_filters.ModelChoiceFilter(
+                queryset=User.objects.all(), to_field_name='groups__name')
+
+        class MyViewSet(ModelViewSet):
+            model = User
+            serializer_class = CommentSerializer
+            filter_class = UserFilter
+
+        class_introspector = self.make_view_introspector(MyViewSet)
+        introspector = get_introspectors(class_introspector)['list']
+        with self.assertNumQueries(0):
+            params = introspector.build_query_parameters_from_django_filters()
+        types = dict((p['name'], (p['type'], p.get('format')))
+                     for p in params)
+        self.assertEqual(types, {
+            'id': ('number', 'double'),
+            'is_staff': ('boolean', None),
+            'joined': ('string', 'date'),
+            'logins_0': ('number', 'double'),
+            'logins_1': ('number', 'double'),
+            'groups': ('integer', 'int64'),
+            'friend': ('string', None),
+            'group': ('string', None),
+        })
+
+        # Built once per FilterSet, and copied for each view
+        params[0]['type'] = 'changed'
+        self.assertEqual(
+            'number',
+            introspector.build_query_parameters_from_django_filters()[0][
+                'type'])
+
+    def test_django_filter_enums_are_copied_for_each_view(self):
+        class UserFilter(django_filters.FilterSet):
+            kind = django_filters.ChoiceFilter(
+                choices=(('a', 'A'), ('b', 'B')))
+
+        class MyViewSet(ModelViewSet):
+            model = User
+            serializer_class = CommentSerializer
+            filter_class = UserFilter
+
+        class_introspector = self.make_view_introspector(MyViewSet)
+        introspector = get_introspectors(class_introspector)['list']
+        params = introspector.build_query_parameters_from_django_filters()
+        params[0]['enum'].append('c')
+        self.assertEqual(
+            ['a', 'b'],
+            introspector.build_query_parameters_from_django_filters()[0][
+                'enum'])
+
     def test_get_summary_empty(self):
         class MyViewSet(ModelViewSet):
             model = User
@@ -1496,6 +1710,48 @@ class BaseMethodIntrospectorTest(TestCase, DocumentationGeneratorMixin):
         self.assertEqual("string", properties["many_related"]["items"]["type"])
         self.assertEqual("string", properties["single_related"]["type"])
 
+    def test_related_and_choice_fields_without_queries(self):
+
+        class RelatedSerializer(serializers.Serializer):
+            user = serializers.PrimaryKeyRelatedField(
+                queryset=User.objects.all())
+            users = serializers.PrimaryKeyRelatedField(
+                queryset=User.objects.all(), many=True)
+            username = serializers.SlugRelatedField(
+                slug_field='username', queryset=User.objects.all())
+            small = serializers.ChoiceField(choices=['a', 'b'])
+            large = serializers.ChoiceField(choices=['a', 'b', 'c'])
+
+        class RelatedAPI(ListCreateAPIView):
+            serializer_class = RelatedSerializer
+
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['enum_max_size'] = 2
+        swagger_settings['data_types'] = {
+            'rest_framework.relations.SlugRelatedField': ('choice', 'choice'),
+        }
+        url_patterns = patterns('', url(r'^my-api/$', RelatedAPI.as_view()))
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            apis = UrlParser().get_apis(url_patterns)
+            with self.assertNumQueries(0):
+                models = self.get_documentation_generator().get_models(apis)
+                introspector = APIViewMethodIntrospector(
+                    self.make_introspector2(RelatedAPI), 'POST')
+                params = introspector.build_form_parameters()
+
+        properties = models["RelatedSerializer"]['properties']
+        self.assertEqual("integer", properties["user"]["type"])
+        self.assertEqual("int64", properties["user"]["format"])
+        self.assertEqual("array", properties["users"]["type"])
+        self.assertEqual({'type': 'integer'}, properties["users"]["items"])
+        self.assertEqual("choice", properties["username"]["type"])
+        self.assertNotIn("enum", properties["username"])
+        self.assertEqual(['a', 'b'], properties["small"]["enum"])
+        self.assertNotIn("enum", properties["large"])
+        self.assertEqual(
+            [None, None, None, ['a', 'b'], None],
+            [param.get('enum') for param in params])
+
     def test_build_form_parameters_allowable_values(self):
 
         class MySerializer(serializers.Serializer):
@@ -1544,6 +1800,51 @@ class BaseMethodIntrospectorTest(TestCase, DocumentationGeneratorMixin):
             self.assertEqual(False, param['required'])
         self.assertEqual(203, param['defaultValue'])
 
+    def test_build_form_parameters_safe_default_values(self):
+
+        def next_number():
+            raise AssertionError('Defaults must not be called')
+
+        class Unhashable(object):
+            __hash__ = None
+
+            def __eq__(self, other):
+                return self is other
+
+            def __call__(self):
+                raise AssertionError('Defaults must not be called')
+
+        from rest_framework.fields import CurrentUserDefault
+        current_user = CurrentUserDefault()
+
+        class MySerializer(serializers.Serializer):
+            number = serializers.IntegerField(default=next_number)
+            created = serializers.DateTimeField(default=datetime.datetime.now)
+            day = serializers.DateField(default=datetime.date.today)
+            code = serializers.CharField(default=Unhashable())
+            owner = serializers.CharField(default=current_user)
+
+        class MyAPIView(ListCreateAPIView):
+            serializer_class = MySerializer
+
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['safe_default_values'] = True
+        class_introspector = self.make_introspector2(MyAPIView)
+        introspector = APIViewMethodIntrospector(class_introspector, 'POST')
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            params = introspector.build_form_parameters()
+
+        defaults = dict((p['name'], p.get('defaultValue')) for p in params)
+        self.assertEqual(
+            '%s.%s' % (__name__, getattr(next_number, '__qualname__',
+                                         'next_number')),
+            defaults['number'])
+        self.assertEqual('date-time', defaults['created'])
+        self.assertEqual('date', defaults['day'])
+        self.assertTrue(defaults['code'].endswith('Unhashable'))
+        self.assertIsNone(defaults['owner'])
+        self.assertFalse(hasattr(current_user, 'user'))
+
     def test_build_form_parameters_enum_values(self):
         MY_CHOICES = (
             ('val1', "Value1"),
@@ -1604,6 +1905,31 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
         doc_parser = introspector.get_yaml_parser()
         self.assertEqual(doc_parser.object['param'], 'my param')
 
+    def test_array_parameter_items(self):
+        class AnAPIView(APIView):
+            def get(self):
+                """
+                ---
+                parameters:
+                    - name: ids
+                      type: array
+                      paramType: form
+                      items:
+                          type: integer
+                """
+                pass
+
+        class_introspector = self.make_introspector(AnAPIView)
+        introspector = APIViewMethodIntrospector(class_introspector, 'GET')
+        params = introspector.get_yaml_parser().get_parameters(AnAPIView)
+
+        from .introspectors import normalize_data_format
+        items = {}
+        normalize_data_format('integer', 'integer', items)
+
+        self.assertEqual('array', params[0]['type'])
+        self.assertEqual(items, params[0]['items'])
+
     def test_yaml_loader_class_yaml(self):
         class AnAPIView(APIView):
             """
@@ -1766,6 +2092,63 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
 
         self.assertEqual(1, len(params))
 
+    def test_replace_keeps_inspected_parameters_of_other_types(self):
+        class SerializedAPI(ListCreateAPIView):
+            serializer_class = CommentSerializer
+
+            def post(self, request, *args, **kwargs):
+                """
+                My post view with custom post parameters
+
+                q -- search query
+                ---
+                parameters_strategy: replace
+                parameters:
+                    - name: name
+                      type: string
+                """
+                return super(SerializedAPI, self).post(
+                    request, *args, **kwargs)
+
+        class_introspector = self.make_introspector(SerializedAPI)
+        introspector = APIViewMethodIntrospector(class_introspector, 'POST')
+        parser = introspector.get_yaml_parser()
+        params = parser.discover_parameters(introspector)
+
+        self.assertEqual(
+            [('name', 'form'), ('q', 'query')],
+            [(param['name'], param['paramType']) for param in params])
+
+    def test_docstring_param_type_overrides_inspected(self):
+        class SerializedAPI(ListCreateAPIView):
+            serializer_class = CommentSerializer
+
+            def post(self, request, *args, **kwargs):
+                """
+                My post view with custom post parameters
+
+                q -- search query
+                ---
+                parameters:
+                    - name: q
+                      type: string
+                      paramType: query
+                    - name: q
+                      type: string
+                      paramType: header
+                """
+                return super(SerializedAPI, self).post(
+                    request, *args, **kwargs)
+
+        class_introspector = self.make_introspector(SerializedAPI)
+        introspector = APIViewMethodIntrospector(class_introspector, 'POST')
+        parser = introspector.get_yaml_parser()
+        params = parser.discover_parameters(introspector)
+
+        self.assertEqual(
+            [('q', 'header'), ('q', 'query')],
+            [(param['name'], param['paramType']) for param in params])
+
     def test_omit_parameters(self):
         class SerializedAPI(ListCreateAPIView):
             serializer_class = CommentSerializer
@@ -1823,10 +2206,9 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
 
         params = parser.discover_parameters(introspector)
         self.assertEqual(2, len(params))
-        query_params = parser._filter_params(params, 'paramType', 'query')
-        form_params = parser._filter_params(params, 'paramType', 'form')
-        self.assertEqual(1, len(list(query_params)))
-        self.assertEqual(1, len(list(form_params)))
+        groups = parser._group_params(params)
+        self.assertEqual(1, len(groups['query']))
+        self.assertEqual(1, len(groups['form']))
 
     def test_parameters_minimum_is_string(self):
         '''
@@ -2069,6 +2451,34 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
         else:
             self.assertTrue(False)
 
+    def test_load_class_is_cached(self):
+        from . import introspectors
+        from .introspectors import YAMLDocstringParser
+
+        class SerializedAPI(ListCreateAPIView):
+            def post(self, request, *args, **kwargs):
+                """
+                ---
+                serializer: CommentSerializer
+                response_serializer: TacoSerializer
+                """
+
+        class_introspector = make_apiview_introspector(SerializedAPI)
+        introspector = APIViewMethodIntrospector(class_introspector, 'POST')
+        parser = introspector.get_yaml_parser()
+
+        with patch.dict(introspectors._loaded_classes, clear=True), \
+                patch.object(YAMLDocstringParser, '_find_class',
+                             wraps=YAMLDocstringParser._find_class) as find:
+            for _ in range(3):
+                self.assertEqual(CommentSerializer,
+                                 parser.get_serializer_class(SerializedAPI))
+                self.assertRaisesRegexp(
+                    Exception, 'Could not find TacoSerializer',
+                    parser.get_response_serializer_class, SerializedAPI)
+
+        self.assertEqual(2, find.call_count)
+
     def test_omit_serializer(self):
         class SerializedAPI(ListCreateAPIView):
             serializer_class = CommentSerializer
@@ -2108,7 +2518,8 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
         urlparser = UrlParser()
         apis = urlparser.get_apis(url_patterns)
         models = generator.get_models(apis)
-        self.assertIn('SerializedAPIPostResponse', models)
+        # Declared by another view's docstring, in another generator
+        self.assertNotIn('SerializedAPIPostResponse', models)
         self.assertIn('WriteCommentSerializer', models)
         self.assertIn('CommentSerializer', models)
         self.assertNotIn('QuerySerializer', models)
@@ -2390,6 +2801,9 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
         self.assertEqual(serializer, None)
         self.assertIn('SerializedAPIPostResponse',
                       generator.explicit_response_types)
+        self.assertNotIn('SerializedAPIPostResponse',
+                         self.get_documentation_generator()
+                         .explicit_response_types)
 
     @no_markdown
     def test_fbv_notes(self):
@@ -2759,6 +3173,160 @@ class CustomDocstringTests(TestCase):
         self.assertEqual("Oh yes this is reST", summary)
 
 
+class DocstringCacheTest(TestCase):
+    def setUp(self):
+        self.view_func = api_settings.VIEW_DESCRIPTION_FUNCTION
+        self.calls = []
+
+        def counting_description(view_cls, html=False):
+            self.calls.append(html)
+            return get_custom_description(view_cls, html)
+
+        api_settings.VIEW_DESCRIPTION_FUNCTION = counting_description
+
+    def tearDown(self):
+        api_settings.VIEW_DESCRIPTION_FUNCTION = self.view_func
+
+    def test_view_description_is_cached(self):
+        from rest_framework_swagger.introspectors import get_view_description
+        first = get_view_description(
+            MockApiView, html=True, docstring="hiya\ntacos")
+        second = get_view_description(
+            MockApiView, html=True, docstring="hiya\ntacos")
+
+        self.assertEqual("hiya<tacos />tacos", first)
+        self.assertEqual(first, second)
+        self.assertEqual([True], self.calls)
+
+    def test_summary_is_cached(self):
+        class CachedView(APIView):
+            """
+            Summary of the view. More words
+            """
+
+        summary = IntrospectorHelper.get_summary(CachedView)
+        calls = len(self.calls)
+
+        self.assertEqual("Summary of the view", summary)
+        self.assertEqual(summary, IntrospectorHelper.get_summary(CachedView))
+        self.assertEqual(calls, len(self.calls))
+
+    def test_changed_renderer_is_not_served_stale(self):
+        from rest_framework_swagger.introspectors import get_view_description
+        get_view_description(MockApiView, html=True, docstring="a\nb")
+        api_settings.VIEW_DESCRIPTION_FUNCTION = get_custom_description
+
+        self.assertEqual(
+            "a<tacos />b",
+            get_view_description(MockApiView, html=True, docstring="a\nb"))
+        self.assertEqual([True], self.calls)
+
+    def test_docstring_override_creates_no_subclass(self):
+        from rest_framework import views
+        from rest_framework_swagger.introspectors import get_view_description
+        api_settings.VIEW_DESCRIPTION_FUNCTION = views.get_view_description
+
+        class OverriddenView(APIView):
+            """
+            Original
+            """
+
+        description = get_view_description(
+            OverriddenView, docstring="Replacement")
+
+        self.assertEqual("Replacement", description)
+        self.assertEqual([], OverriddenView.__subclasses__())
+
+    def test_docstring_override_passes_subclass_checks(self):
+        from rest_framework_swagger.introspectors import get_view_description
+        checks = []
+
+        def checking_description(view_cls, html=False):
+            checks.append((issubclass(view_cls, APIView),
+                           issubclass(view_cls, ModelViewSet),
+                           APIView in view_cls.__mro__))
+            return view_cls.__doc__
+
+        api_settings.VIEW_DESCRIPTION_FUNCTION = checking_description
+        description = get_view_description(
+            MockApiView, docstring="Checked override")
+
+        self.assertEqual("Checked override", description)
+        self.assertEqual([(True, False, True)], checks)
+
+    def test_custom_description_function_is_given_a_class(self):
+        import inspect
+        from rest_framework_swagger.introspectors import get_view_description
+        checks = []
+
+        def checking_description(view_cls, html=False):
+            checks.append((inspect.isclass(view_cls),
+                           isinstance(view_cls, type)))
+            return view_cls.__doc__
+
+        api_settings.VIEW_DESCRIPTION_FUNCTION = checking_description
+        description = get_view_description(
+            MockApiView, docstring="Class override")
+
+        self.assertEqual("Class override", description)
+        self.assertEqual([(True, True)], checks)
+
+    def test_docstring_override_can_be_copied(self):
+        from rest_framework_swagger.introspectors import DocstringOverride
+        override = DocstringOverride(MockApiView, "Copied")
+
+        self.assertEqual("Copied", copy.copy(override).__doc__)
+        self.assertEqual("Copied", copy.deepcopy(override).__doc__)
+        self.assertIs(MockApiView.as_view.__func__,
+                      copy.copy(override).as_view.__func__)
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        from rest_framework_swagger.cache import LRUCache
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual(2, len(cache))
+
+    def test_docstring_is_parsed_once(self):
+        from rest_framework_swagger.docstrings import parse_docstring
+        from rest_framework_swagger.public_api_introspectors import (
+            _split_docstring,
+        )
+        docstring = """
+        Summary
+
+        name -- A name
+        ---
+        parameters:
+            - name: name
+        ---
+        trailing
+        """
+        parsed = parse_docstring(docstring)
+
+        self.assertIs(parsed, parse_docstring(docstring))
+        self.assertEqual([('name', 'A name')], parsed.params)
+        self.assertEqual(
+            "Summary\n\nname -- A name\n---\nparameters:\n    - name: name",
+            IntrospectorHelper.strip_yaml_from_docstring(docstring))
+        self.assertEqual(
+            "Summary\n",
+            IntrospectorHelper.strip_params_from_docstring(docstring))
+        self.assertEqual(
+            ("Summary\n\nname -- A name",
+             "parameters:\n    - name: name\n---\ntrailing"),
+            _split_docstring(docstring))
+        self.assertEqual(
+            ("Summary", None), _split_docstring("Summary"))
+        self.assertTrue(parsed.yaml.startswith("---\nparameters:"))
+
+
 class TestStripTags(TestCase):
     def test1(self):
         self.assertEqual('tacos', strip_tags('tacos'))
@@ -3025,3 +3593,975 @@ if platform.python_version_tuple()[:2] != ('3', '2'):
             response = self.client.get("/swagger/api-docs/v1/a-view")
             json = parse_json(response)
             validator.validate(json)
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        self.url_patterns = patterns(
+            '',
+            url(r'a-view/?$', MockApiView.as_view(), name='a test view'),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = self.url_patterns
+
+    def test_span_sends_signal(self):
+        from .instrumentation import span
+        from .signals import span_finished
+        received = []
+
+        def receiver(sender, name, duration, **kwargs):
+            received.append((sender, name))
+
+        span_finished.connect(receiver)
+        try:
+            with span('tacos'):
+                pass
+        finally:
+            span_finished.disconnect(receiver)
+
+        self.assertEqual([('tacos', 'tacos')], received)
+
+    def test_tracer_setting(self):
+        spans = []
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['tracer'] = lambda name, duration: spans.append(name)
+
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            UrlParser().get_apis(self.url_patterns)
+
+        self.assertEqual(['get_apis'], spans)
+
+    def test_server_timing_header(self):
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['server_timing'] = True
+
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            response = self.client.get("/swagger/api-docs/v1/")
+
+        self.assertIn('get_apis;dur=', response['Server-Timing'])
+        self.assertIn('render;dur=', response['Server-Timing'])
+
+    def test_no_server_timing_header_by_default(self):
+        response = self.client.get("/swagger/api-docs/v1/")
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(DEBUG=True)
+    def test_timings_query_flag(self):
+        response = self.client.get("/swagger/api-docs/v1/?timings")
+        json = parse_json(response)
+        self.assertEqual(1, json['timings']['get_apis']['count'])
+        self.assertIn('Server-Timing', response)
+
+
+class VersionedMockApiView(MockApiView):
+    @staticmethod
+    def is_version_allowed(method, version):
+        return True
+
+
+class StreamingDeclarationTest(TestCase):
+    def setUp(self):
+        self.url_patterns = patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^a-view/child/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = self.url_patterns
+
+    def test_streamed_declaration_matches_rendered(self):
+        import json
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            expected = parse_json(
+                self.client.get("/swagger/api-docs/v1/a-view"))
+
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['streaming_json'] = True
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            response = self.client.get("/swagger/api-docs/v1/a-view")
+            content = b''.join(response.streaming_content).decode()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(2, len(expected['apis']))
+        self.assertEqual(expected, json.loads(content))
+
+    def test_streamed_declaration_has_no_server_timing_header(self):
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['streaming_json'] = True
+        swagger_settings['server_timing'] = True
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            response = self.client.get("/swagger/api-docs/v1/a-view")
+            b''.join(response.streaming_content)
+
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class IncrementalCacheTest(TestCase, DocumentationGeneratorMixin):
+    def setUp(self):
+        from django.core.cache import caches
+        caches['default'].clear()
+        self.apis = UrlParser().get_apis(patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+        ))
+        self.swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        self.swagger_settings['incremental_cache'] = 'default'
+
+    def generate(self):
+        generator = self.get_documentation_generator()
+        with patch.object(generator, '_get_operations',
+                          wraps=generator._get_operations) as generate:
+            apis = generator.generate(self.apis)
+        return apis, generate.call_count
+
+    def test_unchanged_modules_are_not_regenerated(self):
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            first, first_calls = self.generate()
+            second, second_calls = self.generate()
+
+        self.assertEqual(1, first_calls)
+        self.assertEqual(0, second_calls)
+        self.assertEqual(first, second)
+
+    def test_changed_module_is_regenerated(self):
+        from . import dependencies
+        get_signature = dependencies.get_signature
+
+        def touched(module_name, path=None):
+            if module_name == VersionedMockApiView.__module__:
+                return 'touched'
+            return get_signature(module_name, path)
+
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            self.generate()
+            with patch.object(dependencies, 'get_signature', touched):
+                _, calls = self.generate()
+
+        self.assertEqual(1, calls)
+
+    def test_changed_settings_are_regenerated(self):
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            self.generate()
+        self.swagger_settings['enum_max_size'] = 2
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            _, calls = self.generate()
+
+        self.assertEqual(1, calls)
+
+    def test_languages_are_cached_separately(self):
+        from django.utils import translation
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            with translation.override('en'):
+                self.generate()
+            with translation.override('fr'):
+                _, calls = self.generate()
+
+        self.assertEqual(1, calls)
+
+    def test_disabled_by_default(self):
+        self.generate()
+        _, calls = self.generate()
+
+        self.assertEqual(1, calls)
+
+    def test_recording_collects_modules(self):
+        from . import dependencies
+        with dependencies.recording() as outer:
+            with dependencies.recording() as inner:
+                dependencies.record(CommentSerializer)
+
+        self.assertIn(__name__, inner)
+        self.assertIn(serializers.Serializer.__module__, inner)
+        self.assertEqual(inner, outer)
+
+
+class SpecCacheTest(TestCase):
+    def setUp(self):
+        import tempfile
+        import shutil
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        self.swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+
+    def get(self):
+        from .views import SwaggerApiView
+        with patch.object(SwaggerApiView, 'render_declaration_body',
+                          autospec=True,
+                          side_effect=SwaggerApiView.render_declaration_body
+                          ) as render:
+            with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+                response = self.client.get("/swagger/api-docs/v1/a-view")
+        return parse_json(response), render.call_count
+
+    def test_declaration_is_read_from_disk(self):
+        expected, _ = self.get()
+        self.swagger_settings['spec_cache_dir'] = self.directory
+
+        first, first_calls = self.get()
+        second, second_calls = self.get()
+
+        self.assertEqual(1, first_calls)
+        self.assertEqual(0, second_calls)
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+        self.assertEqual(1, len(os.listdir(self.directory)))
+
+    def test_changed_module_is_regenerated(self):
+        from . import dependencies
+        get_signature = dependencies.get_signature
+
+        def touched(module_name, path=None):
+            if module_name == VersionedMockApiView.__module__:
+                return 'touched'
+            return get_signature(module_name, path)
+
+        self.swagger_settings['spec_cache_dir'] = self.directory
+        self.get()
+        with patch.object(dependencies, 'get_signature', touched):
+            _, calls = self.get()
+
+        self.assertEqual(1, calls)
+
+    def test_settings_are_part_of_the_key(self):
+        self.swagger_settings['spec_cache_dir'] = self.directory
+        self.get()
+        self.swagger_settings['api_key'] = 'changed'
+        _, calls = self.get()
+
+        self.assertEqual(1, calls)
+        self.assertEqual(2, len(os.listdir(self.directory)))
+
+    def test_least_recently_written_declarations_are_removed(self):
+        import time
+        from .cache import FileSpecCache
+        cache = FileSpecCache(self.directory, max_files=2)
+        for index, key in enumerate(['a', 'b', 'c']):
+            cache.set(key, [], b'{}')
+            mtime = time.time() - 10 + index
+            os.utime(cache.get_path(key), (mtime, mtime))
+        cache.prune(2)
+
+        self.assertEqual(['b.json', 'c.json'],
+                         sorted(os.listdir(self.directory)))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(b'{}', cache.get('c'))
+
+    def test_directory_is_pruned_every_interval(self):
+        from . import cache as cache_module
+        from .cache import PRUNE_INTERVAL, FileSpecCache
+        self.addCleanup(cache_module._writes_since_prune.clear)
+        cache = FileSpecCache(self.directory, max_files=1)
+        with patch.object(FileSpecCache, 'prune') as prune:
+            for index in range(PRUNE_INTERVAL + 1):
+                cache.set(str(index), [], b'{}')
+
+        self.assertEqual(2, prune.call_count)
+
+    def test_corrupted_declaration_is_a_miss(self):
+        from .cache import FileSpecCache
+        cache = FileSpecCache(self.directory)
+        for content in (b'{"a": ', b'not json\n{}', b'[1]\n{}'):
+            cache.set('key', [], b'{}')
+            with open(cache.get_path('key'), 'wb') as f:
+                f.write(content)
+
+            self.assertIsNone(cache.get('key'))
+            self.assertFalse(os.path.exists(cache.get_path('key')))
+
+
+class PreloadSpecsTest(TestCase):
+    def setUp(self):
+        from .cache import set_spec_store
+        self.addCleanup(set_spec_store, None)
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^api/v1.0/a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^api/v1.0/other/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+
+    def get(self, resource):
+        from .views import SwaggerApiView
+        with patch.object(SwaggerApiView, 'render_declaration_body',
+                          autospec=True,
+                          side_effect=SwaggerApiView.render_declaration_body
+                          ) as render:
+            response = self.client.get(
+                "/swagger/api-docs/v1/api/v1.0/%s" % resource)
+        return parse_json(response), render.call_count
+
+    def test_declarations_are_served_from_store(self):
+        from .preload import preload_specs
+        expected, _ = self.get('a-view')
+        store = preload_specs()
+        declaration, calls = self.get('a-view')
+
+        self.assertEqual(2, len(store))
+        self.assertIsInstance(store.buffer, bytes)
+        self.assertEqual(0, calls)
+        self.assertEqual(expected, declaration)
+
+    def test_other_users_and_apis_are_not_served_from_store(self):
+        from .preload import preload_specs
+        store = preload_specs()
+        api_paths = ['/api/v1.0/a-view/']
+
+        self.assertIsNotNone(store.get(
+            (1, 0), 'api/v1.0/a-view', store.user_key, api_paths))
+        self.assertIsNone(store.get(
+            (1, 0), 'api/v1.0/a-view', ('User', 1), api_paths))
+        self.assertIsNone(store.get(
+            (1, 0), 'api/v1.0/a-view', store.user_key, []))
+
+    def test_other_languages_and_settings_are_not_served_from_store(self):
+        from django.utils import translation
+        from .preload import preload_specs
+        with translation.override('en'):
+            store = preload_specs()
+        api_paths = ['/api/v1.0/a-view/']
+
+        def get():
+            return store.get(
+                (1, 0), 'api/v1.0/a-view', store.user_key, api_paths)
+
+        with translation.override('en'):
+            self.assertIsNotNone(get())
+            with self.settings(SWAGGER_SETTINGS=copy.deepcopy(
+                    DEFAULT_SWAGGER_SETTINGS)):
+                self.assertIsNone(get())
+        with translation.override('fr'):
+            self.assertIsNone(get())
+
+    def test_versions_are_rendered_in_parallel_over_shared_models(self):
+        from .docgenerator import DocumentationGenerator
+        from .preload import preload_specs
+
+        class NoteSerializer(serializers.Serializer):
+            content = serializers.CharField(max_length=200)
+            rating = serializers.IntegerField(default=3)
+
+        class SerializedView(ListCreateAPIView):
+            serializer_class = NoteSerializer
+            is_version_allowed = VersionedMockApiView.is_version_allowed
+
+        versions = [(1, 0), (1, 1), (2, 0)]
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns('', *[
+            url(r'^api/v%s\.%s/%s/?$' % (version + (name,)),
+                SerializedView.as_view())
+            for version in versions for name in ('a-view', 'other')
+        ])
+        expected = preload_specs(versions=versions)
+
+        build = DocumentationGenerator._get_cached_serializer_fields
+        with patch.object(DocumentationGenerator,
+                          '_get_cached_serializer_fields',
+                          autospec=True, side_effect=build) as introspect:
+            store = preload_specs(versions=versions, workers=3)
+
+        self.assertEqual(6, len(store))
+        self.assertEqual(1, introspect.call_count)
+        for version in versions:
+            for name in ('a-view', 'other'):
+                resource = 'api/v%s.%s/%s' % (version + (name,))
+                paths = ['/%s/' % resource]
+                self.assertEqual(
+                    expected.get(version, resource, store.user_key, paths),
+                    store.get(version, resource, store.user_key, paths))
+
+    def test_shared_models_are_introspected_in_parallel(self):
+        import threading
+        from .docgenerator import DocumentationGenerator
+
+        class FirstSerializer(serializers.Serializer):
+            content = serializers.CharField()
+
+        class SecondSerializer(serializers.Serializer):
+            rating = serializers.IntegerField()
+
+        second_started = threading.Event()
+        overlapped = []
+
+        def build(generator, serializer):
+            if serializer is FirstSerializer:
+                overlapped.append(second_started.wait(5))
+            else:
+                second_started.set()
+            return {}
+
+        shared_models = {}
+        results = []
+        with patch.object(DocumentationGenerator,
+                          '_get_cached_serializer_fields',
+                          autospec=True, side_effect=build):
+            threads = [
+                threading.Thread(target=lambda serializer: results.append(
+                    DocumentationGenerator(
+                        shared_models=shared_models)._get_serializer_fields(
+                            serializer)),
+                    args=(serializer,))
+                for serializer in (FirstSerializer, SecondSerializer,
+                                   FirstSerializer)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([True], overlapped)
+        self.assertEqual([{}, {}, {}], results)
+
+
+class SpecGenerationsTest(TestCase):
+    def setUp(self):
+        from .concurrency import futures
+        if futures is None:
+            raise SkipTest('Requires the futures package')
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        self.swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        # Each test gets a pool of its own, with nothing remembered
+        from . import concurrency
+        patcher = patch.object(concurrency, '_generations', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(
+            lambda: concurrency._generations and
+            concurrency._generations.shutdown())
+
+    def wait_for_generations(self):
+        from .concurrency import get_spec_generations
+        generations = get_spec_generations()
+        with generations._lock:
+            pending = list(generations._pending.values())
+        for future in pending:
+            future.result()
+
+    def test_generation_is_offloaded_and_remembered(self):
+        import threading
+        from .views import SwaggerApiView
+        render = SwaggerApiView.render_declaration_body
+        release = threading.Event()
+        threads = []
+
+        def render_in_thread(*args):
+            threads.append(threading.current_thread())
+            release.wait()
+            return render(*args)
+
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            expected = parse_json(
+                self.client.get("/swagger/api-docs/v1/a-view"))
+
+        self.swagger_settings['generation_workers'] = 2
+        with patch.object(SwaggerApiView, 'render_declaration_body',
+                          render_in_thread):
+            with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+                pending = self.client.get("/swagger/api-docs/v1/a-view")
+                release.set()
+                self.wait_for_generations()
+                first = parse_json(
+                    self.client.get("/swagger/api-docs/v1/a-view"))
+                second = parse_json(
+                    self.client.get("/swagger/api-docs/v1/a-view"))
+
+        self.assertEqual(202, pending.status_code)
+        self.assertEqual('1', pending['Retry-After'])
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(threading.current_thread(), threads[0])
+
+    def test_concurrent_misses_share_a_generation(self):
+        import threading
+        from .concurrency import SpecGenerations
+        generations = SpecGenerations(2)
+        self.addCleanup(generations.shutdown)
+        release = threading.Event()
+        generate = Mock(side_effect=lambda: release.wait() and b'{}')
+
+        first = generations.submit('key', generate)
+        second = generations.submit('key', generate)
+        release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(b'{}', first.result())
+        self.assertEqual(b'{}', generations.submit('key', generate).result())
+        self.assertEqual(1, generate.call_count)
+
+    def test_pool_spans_are_timed_for_the_caller(self):
+        from .concurrency import SpecGenerations
+        from .instrumentation import span, start_collecting, stop_collecting
+        generations = SpecGenerations(1)
+        self.addCleanup(generations.shutdown)
+
+        def generate():
+            with span('render'):
+                return b'{}'
+
+        start_collecting()
+        try:
+            generations.submit('key', generate).result()
+        finally:
+            timings = stop_collecting()
+
+        self.assertEqual(1, timings.as_dict()['render']['count'])
+
+    def test_languages_are_generated_separately(self):
+        from django.utils import translation
+        from .views import SwaggerApiView
+        self.swagger_settings['generation_workers'] = 2
+        with patch.object(SwaggerApiView, 'render_declaration_body',
+                          autospec=True,
+                          side_effect=SwaggerApiView.render_declaration_body
+                          ) as render:
+            with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+                for language in ('en', 'fr', 'en'):
+                    with translation.override(language):
+                        self.client.get("/swagger/api-docs/v1/a-view")
+                        self.wait_for_generations()
+
+        self.assertEqual(2, render.call_count)
+
+
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        import threading
+        from .concurrency import SingleFlight
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def blocking(self, result):
+        def generate():
+            self.started.set()
+            self.release.wait()
+            return result
+        return Mock(side_effect=generate)
+
+    def start_leader(self, generate):
+        import threading
+        results = []
+        leader = threading.Thread(target=lambda: results.append(
+            self.single_flight.do('key', generate)))
+        leader.start()
+        self.started.wait()
+        return leader, results
+
+    def test_concurrent_calls_share_a_generation(self):
+        import threading
+        generate = self.blocking('document')
+        leader, results = self.start_leader(generate)
+        flight = self.single_flight._flights['key']
+        waiting = threading.Event()
+        wait = flight.wait
+
+        def follower_wait():
+            waiting.set()
+            return wait()
+
+        flight.wait = follower_wait
+        follower = threading.Thread(target=lambda: results.append(
+            self.single_flight.do('key', generate)))
+        follower.start()
+        waiting.wait()
+        self.release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(['document', 'document'], results)
+        self.assertEqual(1, generate.call_count)
+
+    def test_stale_result_is_served_during_generation(self):
+        self.single_flight.do('key', lambda: 'previous')
+        leader, results = self.start_leader(self.blocking('current'))
+
+        stale = self.single_flight.do('key', Mock(), stale=True)
+        self.release.set()
+        leader.join()
+
+        self.assertEqual('previous', stale)
+        self.assertEqual(['current'], results)
+        self.assertEqual('current', self.single_flight.last.get('key'))
+
+    def test_stale_result_is_served_while_refreshing(self):
+        self.single_flight.do('key', lambda: 'previous')
+        generate = self.blocking('current')
+
+        stale = self.single_flight.do('key', generate, stale=True)
+        self.started.wait()
+        refreshing = self.single_flight.do('key', Mock(), stale=True)
+        flight = self.single_flight._flights['key']
+        self.release.set()
+        flight.done.wait()
+
+        self.assertEqual('previous', stale)
+        self.assertEqual('previous', refreshing)
+        self.assertEqual(1, generate.call_count)
+        self.assertEqual('current', self.single_flight.last.get('key'))
+
+    def test_errors_are_raised(self):
+        generate = Mock(side_effect=ValueError)
+        self.assertRaises(
+            ValueError, self.single_flight.do, 'key', generate)
+        self.assertEqual(0, len(self.single_flight._flights))
+
+    def test_cache_lock(self):
+        from django.core.cache import caches
+        from .concurrency import cache_lock
+        cache = caches['default']
+        cache.clear()
+
+        with cache_lock(cache, 'key') as acquired:
+            with cache_lock(cache, 'key', timeout=0) as reacquired:
+                pass
+
+        self.assertTrue(acquired)
+        self.assertFalse(reacquired)
+        self.assertTrue(cache.add('rest_framework_swagger:lock:key', True))
+
+    def test_views_coalesce_generation(self):
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            expected_api = parse_json(
+                self.client.get("/swagger/api-docs/v1/a-view"))
+            expected_resources = parse_json(
+                self.client.get("/swagger/api-docs/v1/"))
+
+        swagger_settings['single_flight'] = True
+        swagger_settings['generation_lock_cache'] = 'default'
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            api = parse_json(self.client.get("/swagger/api-docs/v1/a-view"))
+            resources = parse_json(self.client.get("/swagger/api-docs/v1/"))
+
+        self.assertEqual(expected_api, api)
+        self.assertEqual(expected_resources, resources)
+
+
+class SwaggerSettingsTest(TestCase):
+    def test_snapshot_is_merged_over_defaults(self):
+        import rest_framework_swagger as rfs
+        provided = {'api_version': '2.0'}
+        with self.settings(SWAGGER_SETTINGS=provided):
+            snapshot = rfs.SWAGGER_SETTINGS
+
+        self.assertEqual({'api_version': '2.0'}, provided)
+        self.assertEqual('2.0', snapshot['api_version'])
+        self.assertEqual(
+            DEFAULT_SWAGGER_SETTINGS['api_path'], snapshot['api_path'])
+        with self.assertRaises(TypeError):
+            snapshot['api_path'] = '/changed/'
+
+    def test_snapshot_is_frozen(self):
+        import rest_framework_swagger as rfs
+        provided = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        provided['exclude_namespaces'] = ['internal']
+        provided['data_types'] = {'app.fields.PointField': ['string', 'wkt']}
+        with self.settings(SWAGGER_SETTINGS=provided):
+            snapshot = rfs.SWAGGER_SETTINGS
+        provided['exclude_namespaces'].append('admin')
+        provided['data_types']['app.fields.Other'] = ['string', 'string']
+
+        self.assertEqual(('internal',), snapshot['exclude_namespaces'])
+        self.assertEqual(
+            {'app.fields.PointField': ('string', 'wkt')},
+            dict(snapshot['data_types']))
+        self.assertEqual([], DEFAULT_SWAGGER_SETTINGS['exclude_namespaces'])
+        with self.assertRaises(TypeError):
+            snapshot['data_types']['app.fields.Other'] = ('string', 'string')
+
+    def test_generation_increases_on_change(self):
+        import rest_framework_swagger as rfs
+        generation = rfs.SWAGGER_SETTINGS.generation
+        with self.settings(SWAGGER_SETTINGS={}):
+            changed = rfs.SWAGGER_SETTINGS.generation
+
+        self.assertGreater(changed, generation)
+        self.assertGreater(rfs.SWAGGER_SETTINGS.generation, changed)
+
+    def test_views_read_current_settings(self):
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+            url(r'^swagger/', include('rest_framework_swagger.urls')),
+        )
+        swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        swagger_settings['api_path'] = '/changed/'
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            response = self.client.get("/swagger/api-docs/v1/a-view")
+
+        self.assertEqual(
+            'http://testserver/changed', parse_json(response)['basePath'])
+
+
+class RecordTest(TestCase):
+    def test_dict_interface(self):
+        from .records import Parameter
+        param = Parameter(name='a', type='string', format='string')
+        param['custom'] = 1
+        del param['format']
+
+        self.assertEqual({'name': 'a', 'type': 'string', 'custom': 1}, param)
+        self.assertNotIn('format', param)
+        self.assertIsNone(param.get('format'))
+        self.assertEqual(1, param.pop('custom'))
+        self.assertEqual('fallback', param.pop('custom', 'fallback'))
+        self.assertRaises(KeyError, lambda: param['required'])
+        self.assertEqual({'name': 'a', 'type': 'string'}, dict(param))
+        self.assertFalse(hasattr(param, '__dict__'))
+
+    def test_pickle_round_trip(self):
+        import pickle
+        from .records import Operation, Parameter
+        operation = Operation(
+            method='GET', parameters=[Parameter(name='a')], extra=True)
+
+        self.assertEqual(operation, pickle.loads(pickle.dumps(operation, 2)))
+
+    def test_to_dict(self):
+        from .compat import OrderedDict
+        from .records import Model, Parameter, to_dict
+        properties = OrderedDict([('a', {'type': 'string'})])
+        models = {'M': Model(id='M', properties=properties)}
+        params = [{'name': 'a'}]
+
+        converted = to_dict(models)
+
+        self.assertIs(dict, type(converted['M']))
+        self.assertIs(properties, converted['M']['properties'])
+        self.assertIs(params, to_dict(params))
+        self.assertIs(dict, type(to_dict([Parameter(name='a')])[0]))
+
+    def test_records_are_kept_until_rendered(self):
+        import json
+        from .records import Endpoint, Model, Operation
+        from .views import SwaggerApiView
+        generator = DocumentationGenerator()
+        apis = UrlParser().get_apis(patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+        ))
+        docs = generator.generate(apis)
+
+        self.assertIsInstance(apis[0], Endpoint)
+        self.assertIsInstance(docs[0]['operations'][0], Operation)
+        for model in generator.get_models(apis).values():
+            self.assertIsInstance(model, Model)
+
+        body = SwaggerApiView().render_declaration_body(
+            DocumentationGenerator(), apis)
+        self.assertEqual('/a-view/', json.loads(body.decode())['apis'][0]['path'])
+
+    def test_public_methods_return_mappings(self):
+        import json
+        from .records import to_dict
+        apis = UrlParser().get_apis(patterns(
+            '',
+            url(r'^a-view/?$', VersionedMockApiView.as_view()),
+        ))
+        operations = DocumentationGenerator().get_operations(apis[0], apis)
+
+        self.assertIsInstance(apis[0], MutableMapping)
+        self.assertEqual('/a-view/', dict(apis[0].items())['path'])
+        self.assertIsInstance(operations[0], MutableMapping)
+        operations[0].update(summary='Updated')
+        self.assertEqual('Updated', dict(operations[0])['summary'])
+        json.dumps(to_dict(operations))
+
+    def test_mapping_interface(self):
+        from .records import Parameter
+        param = Parameter(name='a')
+        param.update({'type': 'string'}, custom=1)
+
+        self.assertIsInstance(param, MutableMapping)
+        self.assertEqual('string', param.setdefault('type', 'integer'))
+        self.assertFalse(param.setdefault('required', False))
+        self.assertEqual(
+            {'name': 'a', 'type': 'string', 'required': False, 'custom': 1},
+            dict(param.items()))
+        self.assertEqual(list(param), [key for key, value in param.items()])
+        self.assertEqual(len(param), len(param.values()))
+
+    def test_items_key_does_not_shadow_items_method(self):
+        from .records import Parameter
+        param = Parameter(name='a', items={'type': 'string'})
+
+        self.assertEqual({'type': 'string'}, param['items'])
+        self.assertEqual(['name', 'items'], list(param))
+        self.assertEqual(
+            {'name': 'a', 'items': {'type': 'string'}}, dict(param.items()))
+
+
+class FormResolver(object):
+    available_versions = [(1, 0), (2, 0)]
+
+    def __init__(self):
+        self.calls = []
+
+    def get_form(self, version, form):
+        self.calls.append((version, form))
+        return form
+
+
+form_resolver = FormResolver()
+
+
+class FormArgsTest(TestCase):
+    def setUp(self):
+        from formencode import Schema, validators
+        from . import public_api_introspectors
+
+        class SearchForm(Schema):
+            source = 'GET'
+            name = validators.String(if_missing='bob', description='Name')
+            kind = validators.OneOf(['a', 'b'], description='Kind')
+
+        class SearchView(APIView):
+            form_classes = {'GET': SearchForm}
+
+        self.view = SearchView
+        self.swagger_settings = copy.deepcopy(DEFAULT_SWAGGER_SETTINGS)
+        self.swagger_settings['version_resolver'] = \
+            'rest_framework_swagger.tests.form_resolver'
+        patcher = patch.object(
+            public_api_introspectors, '_version_resolver', (None, None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(public_api_introspectors._form_args.clear)
+        form_resolver.calls = []
+
+    def test_form_args_are_cached_by_version(self):
+        from .public_api_introspectors import get_class_form_args
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings):
+            params = get_class_form_args('get', self.view, (1, 0))
+            params[0]['description'] = 'Changed'
+            params[1]['enum'].append('changed')
+            self.assertEqual(
+                [{'paramType': 'query', 'name': 'name', 'description': 'Name',
+                  'required': False, 'type': 'string',
+                  'defaultValue': 'bob'},
+                 {'paramType': 'query', 'name': 'kind', 'description': 'Kind',
+                  'required': True, 'type': 'choice', 'enum': ['a', 'b']}],
+                get_class_form_args('GET', self.view, (1, 0)))
+            get_class_form_args('get', self.view, (2, 0))
+
+        self.assertEqual(
+            [(1, 0), (2, 0)],
+            [version for version, _ in form_resolver.calls])
+        self.assertFalse(hasattr(form_resolver, 'current_version'))
+
+    def test_versions_are_resolved_concurrently(self):
+        import threading
+        from formencode import validators
+        from . import public_api_introspectors
+        from .public_api_introspectors import (
+            get_class_form_args,
+            get_current_version,
+        )
+
+        class V2SearchForm(self.view.form_classes['GET']):
+            limit = validators.Int(description='Limit')
+
+        resolved = []
+        results = []
+
+        def get_form(version, form):
+            resolved.append((version, get_current_version()))
+            return V2SearchForm if version == (2, 0) else form
+
+        def get_names(versions):
+            for version in versions:
+                # Every call misses the cache, as if forms were resolved anew
+                public_api_introspectors._form_args.clear()
+                params = get_class_form_args('GET', self.view, version)
+                results.append(
+                    (version, [param['name'] for param in params]))
+
+        with self.settings(SWAGGER_SETTINGS=self.swagger_settings), \
+                patch.object(form_resolver, 'get_form', get_form):
+            threads = [
+                threading.Thread(
+                    target=get_names, args=([(1, 0), (2, 0)] * 25,))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(400, len(results))
+        for version, names in results:
+            expected = ['name', 'kind']
+            if version == (2, 0):
+                expected.append('limit')
+            self.assertEqual(expected, names)
+        self.assertTrue(resolved)
+        for version, current_version in resolved:
+            self.assertEqual(version, current_version)
+        self.assertIsNone(get_current_version())
+
+    def test_validators_are_documented_along_their_mro(self):
+        from formencode import Schema, validators
+        from . import public_api_introspectors
+        from .public_api_introspectors import _process_form, register_validator
+
+        class Colour(validators.OneOf):
+            pass
+
+        class Percentage(validators.Int):
+            min = 0
+            max = 100
+
+        class Point(validators.FancyValidator):
+            pass
+
+        class SubPoint(Point):
+            pass
+
+        class PointForm(Schema):
+            source = 'GET'
+            colour = Colour(['red', 'blue'], description='Colour')
+            opacity = Percentage(description='Opacity')
+            point = SubPoint(description='Point')
+
+        self.addCleanup(
+            public_api_introspectors._validator_handlers.clear)
+        self.addCleanup(
+            public_api_introspectors.VALIDATOR_HANDLERS.pop, Point)
+
+        params = dict((p['name'], p) for p in _process_form(PointForm))
+        self.assertEqual('choice', params['colour']['type'])
+        self.assertEqual(['red', 'blue'], params['colour']['enum'])
+        self.assertEqual('integer', params['opacity']['type'])
+        self.assertEqual(0, params['opacity']['minimum'])
+        self.assertEqual(100, params['opacity']['maximum'])
+        self.assertEqual('string', params['point']['type'])
+
+        @register_validator(Point)
+        def document_point(field_info, field):
+            field_info['type'] = 'string'
+            field_info['format'] = 'wkt'
+
+        params = dict((p['name'], p) for p in _process_form(PointForm))
+        self.assertEqual('wkt', params['point']['format'])
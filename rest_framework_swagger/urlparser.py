@@ -8,6 +8,8 @@ from django.utils import six
 from rest_framework.views import APIView
 
 from .apidocview import APIDocView
+from .instrumentation import traced
+from .records import Endpoint
 
 # The following simplify_regex is taken from Django 1.10 admindocs
 # https://github.com/django/django/blob/1.10/django/contrib/admindocs/views.py
@@ -37,6 +39,7 @@ def simplify_regex(pattern):
 
 class UrlParser(object):
 
+    @traced('get_apis')
     def get_apis(self, patterns=None, urlconf=None, filter_path=None,
                  exclude_namespaces=[], version=None):
         """
@@ -65,7 +68,7 @@ class UrlParser(object):
             filter_path = 'api/v%s.%s/' % version
 
         if filter_path:
-            return self.get_filtered_apis(apis, filter_path)
+            apis = self.get_filtered_apis(apis, filter_path)
 
         return apis
 
@@ -150,11 +153,11 @@ class UrlParser(object):
         if self.__exclude_format_endpoints__(path):
             return
 
-        return {
-            'path': path,
-            'pattern': pattern,
-            'callback': callback,
-        }
+        return Endpoint(
+            path=path,
+            pattern=pattern,
+            callback=callback,
+        )
 
     def __flatten_patterns_tree__(self, patterns, prefix='', filter_path=None,
                                   exclude_namespaces=[]):
@@ -1,26 +1,42 @@
+import functools
 import json
 
 from django.core.exceptions import PermissionDenied
 from django.urls import reverse
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.template import loader
-from django.utils import six
+from django.utils import six, translation
 from django.utils.encoding import smart_text
 from django.utils.safestring import mark_safe
 from django.views.generic import View
 
+from rest_framework import status
 from rest_framework.views import Response
 from rest_framework.settings import api_settings
-from rest_framework.utils import formatting
+from rest_framework.utils import encoders, formatting
 
 from rest_framework_swagger.urlparser import UrlParser
 from rest_framework_swagger.apidocview import APIDocView
 from rest_framework_swagger.docgenerator import DocumentationGenerator
+from rest_framework_swagger.cache import (
+    get_spec_cache,
+    get_spec_store,
+    make_spec_key,
+)
+from rest_framework_swagger.concurrency import (
+    GENERATION_RETRY_AFTER,
+    GenerationPending,
+    get_lock_cache,
+    get_single_flight,
+    get_spec_generations,
+    locked,
+)
 
 import rest_framework_swagger as rfs
 
-from .compat import import_string
+from .compat import OrderedDict, import_string
+from .records import to_dict
 
 try:
     JSONRenderer = list(filter(
@@ -90,18 +106,18 @@ class SwaggerUIView(View):
                 'link': "/v%s/" % ver_str,
             })
 
-        template_name = rfs.SWAGGER_SETTINGS.get('template_path')
+        template_name = rfs.SWAGGER_SETTINGS['template_path']
         data = {
             'swagger_settings': {
                 'discovery_url': "%s/api-docs/v%s/" % (
                     get_full_base_path(request),
                     version_string,
                 ),
-                'api_key': rfs.SWAGGER_SETTINGS.get('api_key', ''),
-                'token_type': rfs.SWAGGER_SETTINGS.get('token_type'),
+                'api_key': rfs.SWAGGER_SETTINGS['api_key'],
+                'token_type': rfs.SWAGGER_SETTINGS['token_type'],
                 'enabled_methods': mark_safe(
-                    json.dumps(rfs.SWAGGER_SETTINGS.get('enabled_methods'))),
-                'doc_expansion': rfs.SWAGGER_SETTINGS.get('doc_expansion', ''),
+                    json.dumps(rfs.SWAGGER_SETTINGS['enabled_methods'])),
+                'doc_expansion': rfs.SWAGGER_SETTINGS['doc_expansion'],
             },
             'version': version_string,
             'available_versions': available_versions,
@@ -112,19 +128,19 @@ class SwaggerUIView(View):
         return HttpResponse(content)
 
     def has_permission(self, request):
-        if rfs.SWAGGER_SETTINGS.get('is_superuser') and \
+        if rfs.SWAGGER_SETTINGS['is_superuser'] and \
                 not request.user.is_superuser:
             return False
 
-        if rfs.SWAGGER_SETTINGS.get('is_authenticated') and \
+        if rfs.SWAGGER_SETTINGS['is_authenticated'] and \
                 not request.user.is_authenticated():
             return False
 
         return True
 
     def handle_permission_denied(self, request):
-        permission_denied_handler = rfs.SWAGGER_SETTINGS.get(
-            'permission_denied_handler')
+        permission_denied_handler = \
+            rfs.SWAGGER_SETTINGS['permission_denied_handler']
         if isinstance(permission_denied_handler, six.string_types):
             permission_denied_handler = import_string(
                 permission_denied_handler)
@@ -141,7 +157,7 @@ class SwaggerResourcesView(APIDocView):
     def get(self, request, version):
         apis = [{'path': '/' + path} for path in self.get_resources()]
         return Response({
-            'apiVersion': rfs.SWAGGER_SETTINGS.get('api_version', ''),
+            'apiVersion': rfs.SWAGGER_SETTINGS['api_version'],
             'swaggerVersion': '1.2',
             'basePath': self.get_base_path(version=version),
             'apis': apis,
@@ -168,13 +184,22 @@ class SwaggerResourcesView(APIDocView):
     def get_resources(self):
         urlparser = UrlParser()
         urlconf = getattr(self.request, "urlconf", None)
-        exclude_namespaces = rfs.SWAGGER_SETTINGS.get('exclude_namespaces')
+        exclude_namespaces = rfs.SWAGGER_SETTINGS['exclude_namespaces']
 
-        apis = urlparser.get_apis(
+        get_apis = functools.partial(
+            urlparser.get_apis,
             urlconf=urlconf,
             exclude_namespaces=exclude_namespaces,
             version=self.version,
         )
+        single_flight = get_single_flight()
+        if single_flight is None:
+            apis = get_apis()
+        else:
+            # Access to the APIs depends on the request, so is checked after
+            apis = single_flight.do(
+                make_spec_key('resources', self.version, urlconf), get_apis,
+                stale=rfs.SWAGGER_SETTINGS['stale_while_revalidate'])
         authorized_apis = filter(lambda a: self.handle_resource_access(self.request, a['pattern']), apis)
         return urlparser.get_top_level_apis(list(authorized_apis))
 
@@ -188,14 +213,120 @@ class SwaggerApiView(APIDocView):
             for_user=request.user,
             version=self.version,
         )
-        return Response({
-            'apiVersion': rfs.SWAGGER_SETTINGS.get('api_version', ''),
-            'swaggerVersion': '1.2',
-            'basePath': self.api_full_uri.rstrip('/'),
-            'resourcePath': '/' + path,
-            'apis': generator.generate(apis),
-            'models': generator.get_models(apis),
-        })
+        declaration = OrderedDict([
+            ('apiVersion', rfs.SWAGGER_SETTINGS['api_version']),
+            ('swaggerVersion', '1.2'),
+            ('basePath', self.api_full_uri.rstrip('/')),
+            ('resourcePath', '/' + path),
+        ])
+
+        try:
+            content = self.get_declaration_body(path, generator, apis)
+        except GenerationPending:
+            return Response(
+                {'detail': 'The API declaration is being generated.'},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': str(GENERATION_RETRY_AFTER)},
+            )
+        if content is not None:
+            return HttpResponse(
+                self.splice_declaration(declaration, content),
+                content_type='application/json',
+            )
+
+        if rfs.SWAGGER_SETTINGS['streaming_json']:
+            return StreamingHttpResponse(
+                self.stream_declaration(declaration, generator, apis),
+                content_type='application/json',
+            )
+
+        declaration['apis'] = to_dict(generator.generate(apis))
+        declaration['models'] = to_dict(generator.get_models(apis))
+        return Response(declaration)
+
+    def get_declaration_body(self, path, generator, apis):
+        """
+        Returns the rendered declaration body from the preloaded store, the
+        on-disk cache or the generations pool, or None when none is in use.
+        Raises GenerationPending while the pool generates it.
+        """
+        api_paths = [api['path'] for api in apis]
+        user_key = generator.get_user_key()
+
+        spec_store = get_spec_store()
+        if spec_store is not None:
+            content = spec_store.get(self.version, path, user_key, api_paths)
+            if content is not None:
+                return content
+
+        spec_cache = get_spec_cache()
+        generations = get_spec_generations()
+        single_flight = get_single_flight()
+        if spec_cache is None and generations is None and \
+                single_flight is None:
+            return None
+
+        key = make_spec_key(
+            self.version,
+            path,
+            api_paths,
+            user_key,
+            getattr(self.request, 'urlconf', None),
+            translation.get_language(),
+        )
+        generate = functools.partial(
+            self.render_declaration_body, generator, apis)
+        if spec_cache is not None:
+            generate = functools.partial(
+                spec_cache.get_or_generate, key, generate)
+
+        lock_cache = get_lock_cache()
+        if lock_cache is not None:
+            generate = locked(lock_cache, key, generate)
+
+        if generations is not None:
+            return generations.get(key, generate)
+        if single_flight is not None:
+            return single_flight.do(
+                key, generate,
+                stale=rfs.SWAGGER_SETTINGS['stale_while_revalidate'])
+        return generate()
+
+    def render_declaration_body(self, generator, apis):
+        """
+        Renders the request independent part of the API declaration
+        """
+        return JSONRenderer().render(OrderedDict([
+            ('apis', to_dict(generator.generate(apis))),
+            ('models', to_dict(generator.get_models(apis))),
+        ]))
+
+    def splice_declaration(self, declaration, body):
+        """
+        Joins the rendered declaration header and a cached body into a
+        single JSON object
+        """
+        header = JSONRenderer().render(declaration)
+        return header[:-1] + b',' + body[1:]
+
+    def stream_declaration(self, declaration, generator, apis):
+        """
+        Yields the API declaration as JSON, documenting one API at a time
+        so the whole `apis` array is never held in memory
+        """
+        encoder_class = getattr(
+            JSONRenderer, 'encoder_class', encoders.JSONEncoder)
+        encode = encoder_class(separators=(',', ':')).encode
+
+        yield '{'
+        for key, value in declaration.items():
+            yield '%s:%s,' % (encode(key), encode(value))
+
+        yield '"apis":['
+        for index, api in enumerate(generator.iter_generate(apis)):
+            yield (',' if index else '') + encode(to_dict(api))
+
+        yield '],"models":%s}' % encode(to_dict(generator.get_models(apis)))
 
     def get_apis_for_resource(self, filter_path):
         urlparser = UrlParser()